@@ -0,0 +1,41 @@
+import hashlib
+import time
+from collections import namedtuple
+from threading import Lock
+
+from rest_framework.renderers import JSONRenderer
+
+from recipes.catalog import get_version
+
+Payload = namedtuple('Payload', ('body', 'etag', 'last_modified'))
+
+
+class CatalogPayload:
+
+    def __init__(self, name, queryset, serializer_class, ttl=None):
+        self.name = name
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.ttl = ttl
+        self._lock = Lock()
+        self._payload = None
+        self._version = None
+        self._built_at = 0
+
+    def build(self, version):
+        serializer = self.serializer_class(self.queryset.all(), many=True)
+        body = JSONRenderer().render(serializer.data)
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        return Payload(body, f'"{self.name}-{digest}"', int(version))
+
+    def get(self):
+        version = get_version(self.name)
+        expired = (self.ttl is not None
+                   and time.monotonic() - self._built_at > self.ttl)
+        if self._version != version or expired:
+            with self._lock:
+                if self._version != version or expired:
+                    self._payload = self.build(version)
+                    self._version = version
+                    self._built_at = time.monotonic()
+        return self._payload
@@ -1,6 +1,8 @@
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Recipe, Tag, Ingredient
+from recipes.models import Recipe, Ingredient
+from recipes.search import search_recipes
+from recipes.tag_index import filter_by_tags, tag_bits
 
 
 class IngredientFilter(FilterSet):
@@ -12,13 +14,19 @@ class IngredientFilter(FilterSet):
 
 
 class RecipeFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all())
+    tags = filters.MultipleChoiceFilter(
+        choices=lambda: [(slug, slug) for slug in tag_bits()],
+        method='tags_filter')
+    tags_match = filters.ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')),
+        method='tags_match_filter')
     is_favorited = filters.BooleanFilter(method='is_favorited_filter')
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter')
+    search = filters.CharFilter(method='search_filter')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'popular'), ('trending', 'trending')),
+        method='ordering_filter')
 
     class Meta:
         model = Recipe
@@ -27,6 +35,20 @@ class RecipeFilter(FilterSet):
             'author',
         )
 
+    def tags_filter(self, queryset, name, value):
+        bits = tag_bits()
+        match_all = self.form.cleaned_data.get('tags_match') == 'all'
+        mask = 0
+        for slug in value:
+            if slug in bits:
+                mask |= 1 << bits[slug]
+            elif match_all:
+                return queryset.none()
+        return filter_by_tags(queryset, mask, match_all)
+
+    def tags_match_filter(self, queryset, name, value):
+        return queryset
+
     def is_favorited_filter(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
@@ -38,3 +60,13 @@ class RecipeFilter(FilterSet):
         if value and user.is_authenticated:
             return queryset.filter(shopping_cart__user=user)
         return queryset
+
+    def search_filter(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def ordering_filter(self, queryset, name, value):
+        if value == 'popular':
+            return queryset.order_by('-favorites_count', '-id')
+        if value == 'trending':
+            return queryset.order_by('-trending_score', '-id')
+        return queryset
@@ -0,0 +1,56 @@
+from django.db.models import Prefetch, prefetch_related_objects
+
+from recipes.fragments import get_fragments, set_fragments
+from recipes.models import RecipeIngredient
+from .metrics import SerializeTimer
+from .relations import get_relations
+from .serializers import RecipeFragmentSerializer, RecipeReadSerializer
+
+
+def get_flag(recipe, name, default):
+    value = getattr(recipe, name, None)
+    return default() if value is None else value
+
+
+@SerializeTimer()
+def render_recipes(recipes, request):
+    fragments = get_fragments([recipe.id for recipe in recipes])
+    missing = [recipe for recipe in recipes if recipe.id not in fragments]
+    if missing:
+        prefetch_related_objects(
+            missing, 'author', 'tags', Prefetch(
+                'recipeingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient')))
+        rendered = {
+            item['id']: item for item in RecipeFragmentSerializer(
+                missing, many=True).data
+        }
+        set_fragments(rendered)
+        fragments.update(rendered)
+    relations = get_relations(request)
+    result = []
+    for recipe in recipes:
+        fragment = fragments[recipe.id]
+        data = dict(
+            fragment,
+            author=dict(fragment['author'], is_subscribed=get_flag(
+                recipe, 'author_is_subscribed',
+                lambda: recipe.author_id in relations.subscribed_ids)),
+            is_favorited=get_flag(
+                recipe, 'is_favorited',
+                lambda: relations.is_favorited(recipe)),
+            is_in_shopping_cart=get_flag(
+                recipe, 'is_in_shopping_cart',
+                lambda: relations.is_in_shopping_cart(recipe)),
+            image=(request.build_absolute_uri(fragment['image'])
+                   if fragment['image'] else fragment['image']),
+            image_variants={
+                variant: request.build_absolute_uri(url)
+                for variant, url in fragment['image_variants'].items()
+            },
+        )
+        result.append({
+            field: data[field] for field in RecipeReadSerializer.Meta.fields
+        })
+    return result
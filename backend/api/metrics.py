@@ -0,0 +1,176 @@
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class Timings:
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.depth = 0
+        self.started = 0.0
+        self.render = 0.0
+
+    def count_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+
+class SerializeTimer(ContextDecorator):
+
+    def __enter__(self):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.depth += 1
+            if timings.depth == 1:
+                timings.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.depth -= 1
+            if timings.depth == 0:
+                timings.serialize += time.perf_counter() - timings.started
+        return False
+
+
+class TimedSerializerMixin:
+
+    def to_representation(self, instance):
+        with SerializeTimer():
+            return super().to_representation(instance)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {total}'
+
+
+class MetricsRegistry:
+    metrics = (
+        ('foodgram_request_duration_seconds', 'total', DURATION_BUCKETS),
+        ('foodgram_db_duration_seconds', 'db', DURATION_BUCKETS),
+        ('foodgram_serialize_duration_seconds', 'serialize',
+         DURATION_BUCKETS),
+        ('foodgram_render_duration_seconds', 'render', DURATION_BUCKETS),
+        ('foodgram_db_queries', 'queries', QUERY_BUCKETS),
+    )
+
+    def __init__(self):
+        self._lock = Lock()
+        self._endpoints = {}
+
+    def observe(self, endpoint, values):
+        with self._lock:
+            histograms = self._endpoints.get(endpoint)
+            if histograms is None:
+                histograms = self._endpoints[endpoint] = {
+                    key: Histogram(buckets)
+                    for _, key, buckets in self.metrics
+                }
+            for key, value in values.items():
+                histograms[key].observe(value)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for name, key, _ in self.metrics:
+                lines.append(f'# TYPE {name} histogram')
+                for (view, method), histograms in sorted(
+                        self._endpoints.items()):
+                    lines.extend(histograms[key].samples(
+                        name, f'endpoint="{view}",method="{method}"'))
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class ServerTimingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith(settings.METRICS_PATH_PREFIX):
+            return self.get_response(request)
+        timings = Timings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings.count_query):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        total = time.perf_counter() - started
+        response['Server-Timing'] = (
+            f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries",'
+            f' serialize;dur={timings.serialize * 1000:.1f},'
+            f' render;dur={timings.render * 1000:.1f},'
+            f' total;dur={total * 1000:.1f}'
+        )
+        match = request.resolver_match
+        if match is not None and match.url_name != 'metrics':
+            registry.observe((match.view_name, request.method), {
+                'total': total,
+                'db': timings.db,
+                'serialize': timings.serialize,
+                'render': timings.render,
+                'queries': timings.queries,
+            })
+        return response
+
+    def process_template_response(self, request, response):
+        timings = current_timings.get()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def stop(response):
+                timings.render += time.perf_counter() - started
+
+            response.add_post_render_callback(stop)
+        return response
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    authorized = token and (
+        request.headers.get('Authorization') == f'Bearer {token}')
+    if not authorized and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4')
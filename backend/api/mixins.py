@@ -0,0 +1,47 @@
+import logging
+
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .metrics import Timings, current_timings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMixin:
+    query_budget = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        timings = current_timings.get()
+        if timings is None:
+            timings = Timings()
+            with connection.execute_wrapper(timings.count_query):
+                response = super().dispatch(request, *args, **kwargs)
+            queries = timings.queries
+        else:
+            started = timings.queries
+            response = super().dispatch(request, *args, **kwargs)
+            queries = timings.queries - started
+        budget = self.query_budget.get(getattr(self, 'action', None))
+        if budget is not None and queries > budget:
+            logger.warning(
+                '%s.%s: %s queries, budget %s', self.__class__.__name__,
+                self.action, queries, budget)
+        return response
+
+
+class PrecomputedListMixin:
+    catalog_payload = None
+
+    def list(self, request, *args, **kwargs):
+        payload = self.catalog_payload.get()
+        response = get_conditional_response(
+            request, etag=payload.etag, last_modified=payload.last_modified)
+        if response is None:
+            response = HttpResponse(
+                payload.body, content_type='application/json')
+        response['ETag'] = payload.etag
+        response['Last-Modified'] = http_date(payload.last_modified)
+        return response
@@ -1,5 +1,69 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
 
 
 class CustomPaginator(PageNumberPagination):
     page_size_query_param = "limit"
+
+
+class CustomCursorPaginator(CursorPagination):
+    page_size_query_param = "limit"
+    ordering = '-id'
+
+
+class OptionalCursorPaginator(CustomPaginator):
+    cursor_query_param = 'cursor'
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.cursor_paginator = None
+            return super().paginate_queryset(queryset, request, view)
+        conflicts = [
+            param for param in getattr(view, 'cursor_incompatible_params', ())
+            if request.query_params.get(param)
+        ]
+        if conflicts:
+            raise ValidationError({self.cursor_query_param: (
+                f'Курсорная пагинация несовместима с параметрами '
+                f'{", ".join(conflicts)}, используйте page.')})
+        self.cursor_paginator = CustomCursorPaginator()
+        self.cursor_paginator.ordering = getattr(
+            view, 'cursor_ordering', CustomCursorPaginator.ordering)
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class FeedPaginator(CustomCursorPaginator):
+
+    def get_before(self, request):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            return int(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_feed_response(self, recipe_ids, data):
+        next_link = None
+        if len(recipe_ids) > self.page_size:
+            next_link = self.encode_cursor(Cursor(
+                offset=0, reverse=False,
+                position=str(recipe_ids[self.page_size - 1])))
+        return Response(OrderedDict([
+            ('next', next_link),
+            ('previous', None),
+            ('results', data),
+        ]))
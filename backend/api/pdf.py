@@ -0,0 +1,142 @@
+import zlib
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.ttfonts import SUBSETN, TTFontFile, makeToUnicodeCMap
+
+PAGES, RESOURCES, CATALOG = 1, 2, 3
+SUBSET_SIZE = 256
+FF_SYMBOLIC, FF_NONSYMBOLIC = 4, 32
+
+
+class StreamingPDF:
+    def __init__(self, font_path, font_size=12, margin=50, pagesize=A4):
+        self.face = TTFontFile(font_path)
+        self.font_size = font_size
+        self.margin = margin
+        self.width, self.height = pagesize
+        self.line_height = font_size * 1.5
+        self.lines_per_page = int(
+            (self.height - 2 * margin) // self.line_height) + 1
+        self.offsets = {}
+        self.position = 0
+        self.count = CATALOG
+        self.pages = []
+        self.assignments = {}
+        self.subsets = [[0]]
+
+    def reserve(self):
+        self.count += 1
+        return self.count
+
+    def write(self, data):
+        self.position += len(data)
+        return data
+
+    def object(self, number, body):
+        self.offsets[number] = self.position
+        return self.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+
+    def stream_object(self, number, content, **extra):
+        content = zlib.compress(content)
+        entries = b''.join(
+            b'/%s %s ' % (key.encode(), str(value).encode())
+            for key, value in extra.items())
+        return self.object(number, b'<< %s/Length %d /Filter /FlateDecode >>'
+                           b'\nstream\n%s\nendstream'
+                           % (entries, len(content), content))
+
+    def begin(self):
+        return self.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def encode(self, text):
+        chunks = []
+        for char in map(ord, text):
+            if char not in self.assignments:
+                if char not in self.face.charToGlyph:
+                    self.assignments[char] = (0, 0)
+                else:
+                    if len(self.subsets[-1]) == SUBSET_SIZE:
+                        self.subsets.append([0])
+                    subset = self.subsets[-1]
+                    self.assignments[char] = (
+                        len(self.subsets) - 1, len(subset))
+                    subset.append(char)
+            subset, code = self.assignments[char]
+            if chunks and chunks[-1][0] == subset:
+                chunks[-1][1].append(code)
+            else:
+                chunks.append((subset, bytearray([code])))
+        return chunks
+
+    def page(self, lines):
+        commands = []
+        y = self.height - self.margin
+        for line in lines:
+            commands.append(b'BT %d %.2f Td' % (self.margin, y))
+            for subset, data in self.encode(line):
+                commands.append(b'/F%d %d Tf <%s> Tj' % (
+                    subset, self.font_size, data.hex().encode()))
+            commands.append(b'ET')
+            y -= self.line_height
+        contents, page = self.reserve(), self.reserve()
+        self.pages.append(page)
+        return self.stream_object(contents, b'\n'.join(commands)) + (
+            self.object(page, (
+                b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] '
+                b'/Resources %d 0 R /Contents %d 0 R >>'
+                % (PAGES, self.width, self.height, RESOURCES, contents))))
+
+    def fonts(self):
+        face = self.face
+        flags = face.flags & ~FF_NONSYMBOLIC | FF_SYMBOLIC
+        for index, subset in enumerate(self.subsets):
+            name = SUBSETN(index) + b'+' + face.name
+            font_file, cmap, descriptor, font = (
+                self.reserve() for _ in range(4))
+            data = face.makeSubset(subset)
+            chunk = self.stream_object(font_file, data, Length1=len(data))
+            chunk += self.stream_object(
+                cmap, makeToUnicodeCMap(name.decode(), subset).encode())
+            chunk += self.object(descriptor, (
+                b'<< /Type /FontDescriptor /FontName /%s /Flags %d '
+                b'/FontBBox [%s] /ItalicAngle %d /Ascent %d /Descent %d '
+                b'/CapHeight %d /StemV %d /MissingWidth %d '
+                b'/FontFile2 %d 0 R >>' % (
+                    name, flags, ' '.join(map(str, face.bbox)).encode(),
+                    face.italicAngle, face.ascent, face.descent,
+                    face.capHeight, face.stemV, face.defaultWidth,
+                    font_file)))
+            widths = ' '.join(
+                str(face.charWidths.get(char, face.defaultWidth))
+                for char in subset)
+            chunk += self.object(font, (
+                b'<< /Type /Font /Subtype /TrueType /BaseFont /%s '
+                b'/FirstChar 0 /LastChar %d /Widths [%s] '
+                b'/FontDescriptor %d 0 R /ToUnicode %d 0 R >>' % (
+                    name, len(subset) - 1, widths.encode(),
+                    descriptor, cmap)))
+            yield index, font, chunk
+
+    def finish(self):
+        chunks = []
+        fonts = []
+        for index, number, chunk in self.fonts():
+            chunks.append(chunk)
+            fonts.append(b'/F%d %d 0 R' % (index, number))
+        chunks.append(self.object(
+            RESOURCES, b'<< /Font << %s >> >>' % b' '.join(fonts)))
+        kids = b' '.join(b'%d 0 R' % page for page in self.pages)
+        chunks.append(self.object(PAGES, b'<< /Type /Pages /Kids [%s] '
+                                         b'/Count %d >>'
+                                  % (kids, len(self.pages))))
+        chunks.append(self.object(
+            CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % PAGES))
+        xref = self.position
+        chunks.append(b'xref\n0 %d\n0000000000 65535 f \n' % (self.count + 1))
+        chunks.extend(
+            b'%010d 00000 n \n' % self.offsets[number]
+            for number in range(1, self.count + 1))
+        chunks.append(b'trailer\n<< /Size %d /Root %d 0 R >>\n'
+                      b'startxref\n%d\n%%%%EOF\n'
+                      % (self.count + 1, CATALOG, xref))
+        return b''.join(chunks)
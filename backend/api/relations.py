@@ -0,0 +1,45 @@
+from django.utils.functional import cached_property
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscribe
+
+
+class UserRelations:
+
+    def __init__(self, user):
+        self.user = user
+
+    def _ids(self, model, field):
+        if not self.user.is_authenticated:
+            return frozenset()
+        return frozenset(model.objects.filter(
+            user=self.user).values_list(field, flat=True))
+
+    @cached_property
+    def subscribed_ids(self):
+        return self._ids(Subscribe, 'author_id')
+
+    @cached_property
+    def favorite_ids(self):
+        return self._ids(Favorite, 'recipe_id')
+
+    @cached_property
+    def shopping_cart_ids(self):
+        return self._ids(ShoppingCart, 'recipe_id')
+
+    def is_subscribed(self, author):
+        return author.id in self.subscribed_ids
+
+    def is_favorited(self, recipe):
+        return recipe.id in self.favorite_ids
+
+    def is_in_shopping_cart(self, recipe):
+        return recipe.id in self.shopping_cart_ids
+
+
+def get_relations(request):
+    relations = getattr(request, '_user_relations', None)
+    if relations is None or relations.user != request.user:
+        relations = UserRelations(request.user)
+        request._user_relations = relations
+    return relations
@@ -0,0 +1,119 @@
+import csv
+import logging
+import os
+
+from django.conf import settings
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+
+try:
+    from .pdf import StreamingPDF
+except ImportError:
+    StreamingPDF = None
+
+logger = logging.getLogger(__name__)
+
+
+class ShoppingListRenderer(BaseRenderer):
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = data.get('detail', data)
+        return str(data).encode(self.charset or 'utf-8')
+
+    def title(self, user, today):
+        return f'Список покупок для: {user.get_full_name()}'
+
+    def lines(self, user, ingredients, today):
+        yield self.title(user, today)
+        yield ''
+        yield f'Дата: {today:%Y-%m-%d}'
+        yield ''
+        for ingredient in ingredients:
+            yield (
+                f'- {ingredient["ingredient__name"]} '
+                f'({ingredient["ingredient__measurement_unit"]})'
+                f' - {ingredient["amount"]}'
+            )
+        yield ''
+        yield f'Foodgram ({today:%Y})'
+
+    def stream(self, user, ingredients, today):
+        separator = ''
+        for line in self.lines(user, ingredients, today):
+            yield f'{separator}{line}'
+            separator = '\n'
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, user, ingredients, today):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('Ингредиент', 'Единица измерения', 'Количество'))
+        for ingredient in ingredients:
+            yield writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['ingredient__measurement_unit'],
+                ingredient['amount'],
+            ))
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_size = 12
+    margin = 50
+
+    def stream(self, user, ingredients, today):
+        pdf = StreamingPDF(
+            settings.SHOPPING_LIST_PDF_FONT, self.font_size, self.margin)
+        yield pdf.begin()
+        page = []
+        for line in self.lines(user, ingredients, today):
+            page.append(line)
+            if len(page) == pdf.lines_per_page:
+                yield pdf.page(page)
+                page = []
+        if page or not pdf.pages:
+            yield pdf.page(page)
+        yield pdf.finish()
+
+
+class ShoppingListContentNegotiation(DefaultContentNegotiation):
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            return renderers[0], renderers[0].media_type
+
+
+SHOPPING_LIST_RENDERERS = [
+    TextShoppingListRenderer,
+    CSVShoppingListRenderer,
+]
+if StreamingPDF is not None:
+    if os.path.exists(settings.SHOPPING_LIST_PDF_FONT):
+        SHOPPING_LIST_RENDERERS.append(PDFShoppingListRenderer)
+    else:
+        logger.error(
+            'Шрифт %s для списка покупок в PDF не найден, выгрузка в PDF '
+            'отключена', settings.SHOPPING_LIST_PDF_FONT)
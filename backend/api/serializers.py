@@ -1,22 +1,33 @@
+from collections import defaultdict
+
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
-from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
 from rest_framework import status
+from django.conf import settings
 from django.db import transaction
-from django.db.models import F
-from django.shortcuts import get_object_or_404
 
 from djoser.serializers import UserCreateSerializer, UserSerializer
 
 from recipes.models import (Recipe, Tag, Ingredient,
                             RecipeIngredient,
-                            Favorite, ShoppingCart)
+                            Favorite, ShoppingCart,
+                            ShoppingCartIngredient)
+from recipes.fragments import invalidate_recipes
+from recipes.pantry import refresh_pantry
+from recipes.tag_index import update_tags_mask
+from recipes.shopping_cart import change_recipe, recipe_amounts
+from recipes.tasks import make_image_variants
+from tasks.models import Task
 from users.models import User, Subscribe
-from .utils import Base64ImageField
+from .metrics import TimedSerializerMixin
+from .relations import get_relations
+from .renderers import SHOPPING_LIST_RENDERERS
+from .utils import Base64ImageField, ImageVariantsField
 
 
-class UserGetSerializer(UserSerializer):
+class UserGetSerializer(TimedSerializerMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -25,14 +36,12 @@ class UserGetSerializer(UserSerializer):
                   'last_name', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
-        return (
-            self.context.get('request').user.is_authenticated
-            and Subscribe.objects.filter(
-                user=self.context.get('request').user,
-                author=obj).exists())
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return get_relations(self.context.get('request')).is_subscribed(obj)
 
 
-class UserSignUpSerializer(UserCreateSerializer):
+class UserSignUpSerializer(TimedSerializerMixin, UserCreateSerializer):
 
     class Meta:
         model = User
@@ -40,23 +49,31 @@ class UserSignUpSerializer(UserCreateSerializer):
                   'first_name', 'last_name', 'password',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_variants', 'cooking_time')
+
+
+class RecipesLimitSerializer(serializers.Serializer):
+    recipes_limit = serializers.IntegerField(
+        default=settings.RECIPES_LIMIT_MAX,
+        min_value=1,
+        max_value=settings.RECIPES_LIMIT_MAX,
+    )
 
 
 class SubscribeSerializer(UserGetSerializer):
-    recipes_count = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
 
     class Meta(UserGetSerializer.Meta):
         fields = ('id', 'email', 'username', 'first_name',
-                  'last_name', 'password', 'recipes_count', 'recipes')
+                  'last_name', 'is_subscribed', 'recipes_count', 'recipes')
         read_only_fields = ('email', 'username', 'first_name',
-                            'last_name', 'password', 'recipes_count')
+                            'last_name', 'recipes_count')
 
     def validate(self, data):
         author = self.instance
@@ -73,33 +90,48 @@ class SubscribeSerializer(UserGetSerializer):
             )
         return data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes[:int(limit)]
-        serializer = RecipeSerializer(recipes, many=True, read_only=True)
+        serializer = RecipeSerializer(
+            obj.recipes.all(), many=True, read_only=True)
         return serializer.data
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'name', 'slug', 'color')
         model = Tag
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Ingredient
         fields = '__all__'
 
 
+class IngredientSearchSerializer(serializers.Serializer):
+    name = serializers.CharField(required=False, default='', allow_blank=True)
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+
+class PantryRecipeSerializer(RecipeSerializer):
+    matched = serializers.IntegerField(read_only=True)
+    total = serializers.IntegerField(read_only=True)
+    missing = IngredientSerializer(many=True, read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('matched', 'total', 'missing')
+
+
+class PantrySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False)
+    limit = serializers.IntegerField(
+        default=20, min_value=1, max_value=settings.RECIPES_LIMIT_MAX)
+    max_missing = serializers.IntegerField(required=False, min_value=0)
+
+
 class CreateRecipeIngredientSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField()
 
@@ -108,45 +140,165 @@ class CreateRecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = UserGetSerializer(read_only=True)
     ingredients = serializers.SerializerMethodField()
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
-                  'is_in_shopping_cart', 'name', 'image',
+                  'is_in_shopping_cart', 'name', 'image', 'image_variants',
                   'text', 'cooking_time')
 
     def get_ingredients(self, obj):
-        recipe = obj
-        ingredients = recipe.ingredients.values(
-            'id',
-            'name',
-            'measurement_unit',
-            amount=F('recipeingredients__amount')
-        )
-        return ingredients
+        return [
+            {
+                'id': item.ingredient.id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in obj.recipeingredients.all()
+        ]
 
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.favorites.filter(recipe=obj).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return get_relations(self.context.get('request')).is_favorited(obj)
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return user.shopping_cart.filter(recipe=obj).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return get_relations(
+            self.context.get('request')).is_in_shopping_cart(obj)
+
+
+class AuthorFragmentSerializer(TimedSerializerMixin,
+                               serializers.ModelSerializer):
 
+    class Meta:
+        model = User
+        fields = ('email', 'id', 'username', 'first_name', 'last_name')
+
+
+class RecipeFragmentSerializer(RecipeReadSerializer):
+    author = AuthorFragmentSerializer(read_only=True)
+
+    class Meta(RecipeReadSerializer.Meta):
+        fields = ('id', 'tags', 'author', 'ingredients', 'name', 'image',
+                  'image_variants', 'text', 'cooking_time')
+
+
+def find_missing(model, ids):
+    if not ids:
+        return set()
+    return set(ids) - set(
+        model.objects.filter(id__in=ids).values_list('id', flat=True))
+
+
+def validate_references(recipes):
+    errors = {}
+    missing_tags = find_missing(Tag, {
+        tag for recipe in recipes for tag in recipe.get('tags', ())
+    })
+    if missing_tags:
+        errors['tags'] = f'Теги не найдены: {sorted(missing_tags)}'
+    missing_ingredients = find_missing(Ingredient, {
+        item['id']
+        for recipe in recipes for item in recipe.get('ingredients', ())
+    })
+    if missing_ingredients:
+        errors['ingredients'] = (
+            f'Ингредиенты не найдены: {sorted(missing_ingredients)}')
+    if errors:
+        raise ValidationError(errors)
+
+
+def create_recipe_relations(recipes):
+    RecipeTag = Recipe.tags.through
+    RecipeTag.objects.bulk_create([
+        RecipeTag(recipe=recipe, tag_id=tag)
+        for recipe, tags, _ in recipes for tag in tags
+    ])
+    update_tags_mask([recipe.id for recipe, tags, _ in recipes if tags])
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient_id=ingredient['id'],
+            amount=ingredient['amount']
+        )
+        for recipe, _, ingredients in recipes for ingredient in ingredients
+    ])
+
+
+def update_recipe_ingredients(recipe, old_amounts, new_amounts):
+    removed = old_amounts.keys() - new_amounts.keys()
+    if removed:
+        RecipeIngredient.objects.filter(
+            recipe=recipe, ingredient_id__in=removed).delete()
+    by_amount = defaultdict(list)
+    for ingredient_id in old_amounts.keys() & new_amounts.keys():
+        if old_amounts[ingredient_id] != new_amounts[ingredient_id]:
+            by_amount[new_amounts[ingredient_id]].append(ingredient_id)
+    for amount, ingredient_ids in by_amount.items():
+        RecipeIngredient.objects.filter(
+            recipe=recipe, ingredient_id__in=ingredient_ids
+        ).update(amount=amount)
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient_id=ingredient_id,
+            amount=new_amounts[ingredient_id]
+        )
+        for ingredient_id in new_amounts.keys() - old_amounts.keys()
+    ])
 
-class RecipeCreateSerializer(serializers.ModelSerializer):
-    tags = PrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
+
+class RecipeCreateListSerializer(TimedSerializerMixin,
+                                 serializers.ListSerializer):
+
+    def validate(self, attrs):
+        if not attrs:
+            raise ValidationError('Нужен хотя бы один рецепт')
+        if len(attrs) > settings.RECIPES_BULK_MAX:
+            raise ValidationError(
+                f'Не больше {settings.RECIPES_BULK_MAX} рецептов за раз')
+        validate_references(attrs)
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        recipes = []
+        for attrs in validated_data:
+            tags = attrs.pop('tags')
+            ingredients = attrs.pop('ingredients')
+            recipes.append(
+                (Recipe.objects.create(**attrs), tags, ingredients))
+        create_recipe_relations(recipes)
+        created = [recipe for recipe, _, _ in recipes]
+        invalidate_recipes([recipe.id for recipe in created])
+        refresh_pantry([recipe.id for recipe in created])
+        for recipe in created:
+            if recipe.image:
+                make_image_variants.delay(recipe.id)
+        return created
+
+    def to_representation(self, data):
+        request = self.context.get('request')
+        recipes = Recipe.objects.with_flags(request.user).with_related(
+        ).filter(pk__in=[recipe.pk for recipe in data]).order_by('id')
+        return RecipeReadSerializer(
+            recipes, many=True, context={'request': request}).data
+
+
+class RecipeCreateSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
+    tags = serializers.ListField(child=serializers.IntegerField())
     author = UserGetSerializer(read_only=True)
     ingredients = CreateRecipeIngredientSerializer(many=True)
     image = Base64ImageField()
@@ -163,6 +315,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time',
         )
+        list_serializer_class = RecipeCreateListSerializer
 
     def validate_ingredients(self, value):
         ingredients = value
@@ -170,72 +323,88 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             raise ValidationError({
                 'ingredients': 'Нужен хотя бы один ингредиент!'
             })
-        ingredients_list = []
-        for item in ingredients:
-            ingredient = get_object_or_404(Ingredient, id=item['id'])
-            if ingredient in ingredients_list:
-                raise ValidationError({
-                    'ingredients': 'Ингридиенты не могут повторяться'
-                })
-            if int(item['amount']) <= 0:
-                raise ValidationError({
-                    'amount': 'Количество ингредиента должно быть больше 0'
-                })
-            ingredients_list.append(ingredient)
+        if len({item['id'] for item in ingredients}) != len(ingredients):
+            raise ValidationError({
+                'ingredients': 'Ингридиенты не могут повторяться'
+            })
+        if any(int(item['amount']) <= 0 for item in ingredients):
+            raise ValidationError({
+                'amount': 'Количество ингредиента должно быть больше 0'
+            })
         return value
 
     def validate_tags(self, value):
         tags = value
         if not tags:
             raise ValidationError({'tags': 'Нужно выбрать хотя бы один тег'})
-        tags_list = []
-        for tag in tags:
-            if tag in tags_list:
-                raise ValidationError(
-                    {'tags': 'Теги должны быть уникальными'})
-            tags_list.append(tag)
+        if len(set(tags)) != len(tags):
+            raise ValidationError(
+                {'tags': 'Теги должны быть уникальными'})
         return value
 
-    @transaction.atomic
-    def create_ingredients_amounts(self, ingredients, recipe):
-        RecipeIngredient.objects.bulk_create(
-            [RecipeIngredient(
-                ingredient=Ingredient.objects.get(id=ingredient['id']),
-                recipe=recipe,
-                amount=ingredient['amount']
-            ) for ingredient in ingredients]
-        )
+    def validate(self, attrs):
+        if not isinstance(self.parent, serializers.ListSerializer):
+            validate_references([attrs])
+        return attrs
 
     @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(**validated_data)
-        recipe.tags.set(tags)
-        self.create_ingredients_amounts(
-            recipe=recipe, ingredients=ingredients)
+        create_recipe_relations([(recipe, tags, ingredients)])
+        refresh_pantry([recipe.id])
+        if recipe.image:
+            make_image_variants.delay(recipe.id)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
-        tags = validated_data.pop('tags')
-        ingredients = validated_data.pop('ingredients')
-        instance = super().update(instance, validated_data)
-        instance.tags.clear()
-        instance.tags.set(tags)
-        instance.ingredients.clear()
-        self.create_ingredients_amounts(
-            recipe=instance, ingredients=ingredients)
-        instance.save()
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        if 'image' in validated_data:
+            validated_data['image_variants'] = {}
+            make_image_variants.delay(instance.id)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            old_amounts = recipe_amounts(instance.id)
+            new_amounts = {
+                ingredient['id']: ingredient['amount']
+                for ingredient in ingredients
+            }
+            update_recipe_ingredients(instance, old_amounts, new_amounts)
+            kept_amounts = {
+                ingredient_id: amount
+                for ingredient_id, amount in old_amounts.items()
+                if ingredient_id in new_amounts
+            }
+            change_recipe(instance.id, kept_amounts, new_amounts)
+            refresh_pantry([instance.id])
+        invalidate_recipes([instance.id])
         return instance
 
     def to_representation(self, instance):
         request = self.context.get('request')
         context = {'request': request}
+        instance = Recipe.objects.with_flags(
+            request.user).with_related().get(pk=instance.pk)
         return RecipeReadSerializer(instance, context=context).data
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.RECIPES_BULK_MAX,
+    )
+
+
+class FavoriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Favorite
@@ -256,7 +425,8 @@ class FavoriteSerializer(serializers.ModelSerializer):
         ).data
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
 
     class Meta:
         model = ShoppingCart
@@ -275,3 +445,39 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
             instance.recipe,
             context={'request': request}
         ).data
+
+
+class ShoppingCartIngredientSerializer(TimedSerializerMixin,
+                                       serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit')
+
+    class Meta:
+        model = ShoppingCartIngredient
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class ShoppingListExportSerializer(serializers.Serializer):
+    format = serializers.ChoiceField(
+        choices=[renderer.format for renderer in SHOPPING_LIST_RENDERERS],
+        default='txt',
+    )
+
+
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Task
+        fields = ('id', 'name', 'status', 'attempts', 'result', 'error',
+                  'download', 'created', 'updated')
+
+    def get_download(self, obj):
+        if obj.status != Task.SUCCESS or not isinstance(obj.result, dict):
+            return None
+        if 'file' not in obj.result:
+            return None
+        return reverse('tasks-download', args=[obj.pk],
+                       request=self.context.get('request'))
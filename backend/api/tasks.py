@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime, timedelta
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+from recipes.shopping_cart import shopping_list
+from tasks.queue import task
+from users.models import User
+from .renderers import SHOPPING_LIST_RENDERERS
+
+exports_storage = FileSystemStorage(location=settings.EXPORTS_ROOT)
+
+
+@task(max_attempts=2)
+def export_shopping_list(user_id, file_format):
+    user = User.objects.get(pk=user_id)
+    renderer = next(
+        renderer() for renderer in SHOPPING_LIST_RENDERERS
+        if renderer.format == file_format)
+    with SpooledTemporaryFile(max_size=1024 * 1024) as buffer:
+        chunks = renderer.stream(
+            user, shopping_list(user).iterator(), datetime.today())
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(renderer.charset)
+            buffer.write(chunk)
+        buffer.seek(0)
+        name = exports_storage.save(
+            f'{user.username}_shopping_list_'
+            f'{uuid.uuid4().hex[:8]}.{renderer.format}',
+            File(buffer),
+        )
+    return {'file': name}
+
+
+@task(max_attempts=1)
+def purge_exports():
+    expired_before = timezone.now() - timedelta(seconds=settings.EXPORTS_TTL)
+    if not exports_storage.exists(''):
+        return {'deleted': 0}
+    _, names = exports_storage.listdir('')
+    deleted = 0
+    for name in names:
+        if exports_storage.get_modified_time(name) < expired_before:
+            exports_storage.delete(name)
+            deleted += 1
+    return {'deleted': deleted}
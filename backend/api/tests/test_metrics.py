@@ -0,0 +1,32 @@
+import re
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.metrics import registry
+from recipes.tests.utils import create_recipe, create_user
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_recipe(create_user('author'))
+
+    def test_server_timing_reports_serialization(self):
+        response = APIClient().get('/api/recipes/')
+        timings = dict(re.findall(
+            r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+        self.assertEqual(
+            set(timings), {'db', 'serialize', 'render', 'total'})
+        self.assertGreater(float(timings['serialize']), 0)
+        self.assertIn(
+            'foodgram_serialize_duration_seconds_count{'
+            'endpoint="recipes-list",method="GET"}', registry.render())
+
+    def test_metrics_require_token(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/metrics/').status_code, 403)
+        client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(client.get('/api/metrics/').status_code, 200)
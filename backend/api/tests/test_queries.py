@@ -0,0 +1,129 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.views import RecipeViewSet
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from recipes.tests.utils import create_recipe, create_user
+from users.models import Subscribe
+
+
+class QueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', slug=f'tag-{number}',
+                color=f'#00000{number}')
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(5)
+        ]
+        cls.authors = []
+        cls.add_authors(3)
+
+    @classmethod
+    def add_authors(cls, count):
+        for _ in range(count):
+            author = create_user(f'author{len(cls.authors)}')
+            cls.authors.append(author)
+            Subscribe.objects.create(user=cls.user, author=author)
+            for _ in range(3):
+                recipe = cls.add_recipe(author)
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    @classmethod
+    def add_recipe(cls, author):
+        recipe = create_recipe(author)
+        recipe.tags.set(cls.tags[:2])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+            for ingredient in cls.ingredients[:3]
+        ])
+        return recipe
+
+    def setUp(self):
+        cache.clear()
+        self.guest = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertConstantQueries(self, client, url, count):
+        with self.assertNumQueries(count):
+            first = client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.add_authors(2)
+        cache.clear()
+        with self.assertNumQueries(count):
+            second = client.get(url)
+        self.assertEqual(second.status_code, 200)
+        return first, second
+
+    def test_recipe_list(self):
+        self.assertConstantQueries(self.guest, '/api/recipes/', 4)
+        self.assertConstantQueries(self.client, '/api/recipes/', 4)
+        self.assertConstantQueries(
+            self.client, f'/api/recipes/?tags={self.tags[0].slug}'
+                         f'&is_favorited=1&is_in_shopping_cart=1', 6)
+
+    @mock.patch('recipes.fragments.cache_is_shared', return_value=True)
+    @mock.patch('api.views.cache_is_shared', return_value=True)
+    def test_recipe_list_with_shared_cache(self, *mocks):
+        _, rendered = self.assertConstantQueries(
+            self.client, '/api/recipes/', 5)
+        with self.assertNumQueries(2):
+            cached = self.client.get('/api/recipes/')
+        self.assertEqual(cached.data, rendered.data)
+
+    def test_recipe_retrieve(self):
+        recipe = Recipe.objects.first()
+        url = f'/api/recipes/{recipe.id}/'
+        self.assertConstantQueries(self.guest, url, 3)
+        self.assertConstantQueries(self.client, url, 3)
+
+    def test_recipe_actions_within_budget(self):
+        recipe = Recipe.objects.first()
+        urls = {
+            'list': f'/api/recipes/?tags={self.tags[0].slug}'
+                    f'&is_favorited=1&is_in_shopping_cart=1',
+            'retrieve': f'/api/recipes/{recipe.id}/',
+            'feed': '/api/recipes/feed/',
+        }
+        for action, url in urls.items():
+            with self.subTest(action=action):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(
+                    len(queries), RecipeViewSet.query_budget[action])
+
+    def test_subscriptions(self):
+        first, second = self.assertConstantQueries(
+            self.client, '/api/users/subscriptions/?recipes_limit=2', 3)
+        self.assertEqual(first.data['count'], 3)
+        self.assertEqual(second.data['count'], 5)
+        self.assertEqual(len(second.data['results'][0]['recipes']), 2)
+
+    def test_users(self):
+        self.assertConstantQueries(self.guest, '/api/users/', 2)
+        self.assertConstantQueries(self.client, '/api/users/', 3)
+
+    def test_budget_overrun_is_logged(self):
+        recipe = Recipe.objects.first()
+        budget = dict(RecipeViewSet.query_budget, retrieve=1)
+        with mock.patch.object(RecipeViewSet, 'query_budget', budget):
+            with self.assertLogs('api.mixins', 'WARNING') as logs:
+                response = self.client.get(f'/api/recipes/{recipe.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('RecipeViewSet.retrieve', logs.output[0])
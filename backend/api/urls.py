@@ -1,15 +1,18 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .metrics import metrics_view
 from .views import (TagViewSet, IngredientViewSet,
-                    RecipeViewSet)
+                    RecipeViewSet, TaskViewSet)
 
 router = DefaultRouter()
 
 router.register('tags', TagViewSet, basename='tags')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
+router.register('tasks', TaskViewSet, basename='tasks')
 
 urlpatterns = [
+    path('metrics/', metrics_view, name='metrics'),
     path('', include(router.urls)),
 ]
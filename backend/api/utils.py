@@ -1,15 +1,52 @@
 import base64
+import binascii
+import uuid
 
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 
 
 class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'invalid_base64': 'Некорректное изображение в формате base64.',
+        'too_large': 'Размер изображения не должен превышать {max_bytes} байт.',
+        'too_many_pixels': (
+            'Изображение не должно превышать {max_pixels} пикселей.'),
+    }
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
+            format, _, imgstr = data.partition(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            if len(imgstr) * 3 // 4 > settings.RECIPE_IMAGE_MAX_BYTES:
+                self.fail(
+                    'too_large', max_bytes=settings.RECIPE_IMAGE_MAX_BYTES)
+            try:
+                content = base64.b64decode(imgstr, validate=True)
+            except binascii.Error:
+                self.fail('invalid_base64')
+            data = ContentFile(content, name=f'{uuid.uuid4().hex}.{ext}')
 
-        return super().to_internal_value(data)
+        file = super().to_internal_value(data)
+        image = getattr(file, 'image', None)
+        if image is not None:
+            width, height = image.size
+            if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+                self.fail('too_many_pixels',
+                          max_pixels=settings.RECIPE_IMAGE_MAX_PIXELS)
+        return file
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        variants = {}
+        for variant, name in (value or {}).items():
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            variants[variant] = url
+        return variants
@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -9,41 +10,111 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from recipes.models import (Recipe, Tag, Ingredient, Favorite,
-                            ShoppingCart, RecipeIngredient)
+from recipes.autocomplete import ingredient_index
+from recipes.counters import recount_favorites
+from recipes.feed import feed_ids
+from recipes.fragments import cache_is_shared
+from recipes.pantry import pantry_index
+from recipes.related import log_favorite_changes
+from recipes.tag_index import tag_facets
+from recipes.models import Recipe, Tag, Ingredient, Favorite, ShoppingCart
+from recipes.shopping_cart import rebuild, shopping_list
+from tasks.models import Task
 from .serializers import (
     TagSerializer,
     IngredientSerializer,
+    IngredientSearchSerializer,
     RecipeSerializer,
     RecipeReadSerializer,
-    RecipeCreateSerializer,)
+    RecipeCreateSerializer,
+    RecipeIdsSerializer,
+    PantrySerializer,
+    PantryRecipeSerializer,
+    ShoppingCartIngredientSerializer,
+    ShoppingListExportSerializer,
+    TaskSerializer,)
 from .permissions import IsAdminAuthorOrReadOnly
+from .renderers import (SHOPPING_LIST_RENDERERS,
+                        ShoppingListContentNegotiation)
+from .tasks import export_shopping_list, exports_storage
+from .catalog import CatalogPayload
+from .fragments import render_recipes
+from .mixins import PrecomputedListMixin, QueryBudgetMixin
 from .filters import IngredientFilter, RecipeFilter
-from .paginations import CustomPaginator
+from .paginations import FeedPaginator, OptionalCursorPaginator
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+def sync_favorites(user_id, recipe_ids):
+    recount_favorites(recipe_ids)
+    log_favorite_changes(user_id, recipe_ids)
+
+
+class IngredientViewSet(PrecomputedListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny, )
     filter_backends = (DjangoFilterBackend, )
     filterset_class = IngredientFilter
     pagination_class = None
+    catalog_payload = CatalogPayload(
+        'ingredients', queryset, serializer_class,
+        ttl=settings.CATALOG_PAYLOAD_TTL)
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params:
+            return super().list(request, *args, **kwargs)
+        serializer = IngredientSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(ingredient_index.search(
+            serializer.validated_data['name'],
+            serializer.validated_data.get('limit'),
+        ))
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+
+class TagViewSet(PrecomputedListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
+    catalog_payload = CatalogPayload(
+        'tags', queryset, serializer_class,
+        ttl=settings.CATALOG_PAYLOAD_TTL)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend,)
-    paginations_class = CustomPaginator
+    pagination_class = OptionalCursorPaginator
     permission_classes = (IsAdminAuthorOrReadOnly,)
     filterset_class = RecipeFilter
+    cursor_incompatible_params = ('search', 'ordering')
+    query_budget = {'list': 7, 'retrieve': 5, 'related': 3,
+                    'pantry': 4, 'feed': 7}
+
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return self.get_page_queryset()
+        return Recipe.objects.all()
+
+    def get_page_queryset(self):
+        queryset = Recipe.objects.with_flags(self.request.user)
+        if not cache_is_shared():
+            queryset = queryset.with_related()
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(render_recipes(list(queryset), request))
+        response = self.get_paginated_response(render_recipes(page, request))
+        if request.query_params.get('facets') in ('1', 'true'):
+            response.data['facets'] = tag_facets(
+                self.filter_queryset(Recipe.objects.all()))
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(render_recipes([self.get_object()], request)[0])
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -53,6 +124,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeReadSerializer
         return RecipeCreateSerializer
 
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAuthenticated, ])
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(author=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -63,22 +144,118 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return self.add_to(Favorite, request.user, pk)
         return self.delete_from(Favorite, request.user, pk)
 
+    @transaction.atomic
     def add_to(self, model, user, pk):
-        if model.objects.filter(user=user, recipe__id=pk).exists():
+        recipe = get_object_or_404(Recipe, id=pk)
+        try:
+            with transaction.atomic():
+                model.objects.create(user=user, recipe=recipe)
+        except IntegrityError:
             return Response({'errors': 'Рецепт уже добавлен!'},
                             status=status.HTTP_400_BAD_REQUEST)
-        recipe = get_object_or_404(Recipe, id=pk)
-        model.objects.create(user=user, recipe=recipe)
         serializer = RecipeSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @transaction.atomic
     def delete_from(self, model, user, pk):
-        obj = model.objects.filter(user=user, recipe__id=pk)
-        if obj.exists():
-            obj.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response({'errors': 'Рецепт уже удален!'},
-                        status=status.HTTP_400_BAD_REQUEST)
+        deleted, _ = model.objects.filter(user=user, recipe__id=pk).delete()
+        if not deleted:
+            return Response({'errors': 'Рецепт уже удален!'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @transaction.atomic
+    def add_many(self, model, user, recipe_ids, on_change=None):
+        recipes = Recipe.objects.filter(id__in=recipe_ids)
+        missing = set(recipe_ids) - {recipe.id for recipe in recipes}
+        if missing:
+            return Response(
+                {'errors': f'Рецепты не найдены: {sorted(missing)}'},
+                status=status.HTTP_400_BAD_REQUEST)
+        model.objects.bulk_create(
+            [model(user=user, recipe=recipe) for recipe in recipes],
+            ignore_conflicts=True,
+        )
+        if on_change is not None:
+            on_change(user.id, recipe_ids)
+        serializer = RecipeSerializer(recipes, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    def delete_many(self, model, user, recipe_ids):
+        model.objects.filter(user=user, recipe__id__in=recipe_ids).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_recipe_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated, ])
+    def feed(self, request):
+        paginator = FeedPaginator()
+        before = paginator.get_before(request)
+        recipe_ids = feed_ids(request.user, before, paginator.page_size + 1)
+        page_ids = recipe_ids[:paginator.page_size]
+        recipes = sorted(
+            self.get_page_queryset().filter(id__in=page_ids),
+            key=lambda recipe: recipe.id, reverse=True)
+        return paginator.get_feed_response(
+            recipe_ids, render_recipes(recipes, request))
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def pantry(self, request):
+        serializer = PantrySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        matches = pantry_index.search(
+            serializer.validated_data['ingredients'],
+            serializer.validated_data['limit'],
+            serializer.validated_data.get('max_missing'),
+        )
+        recipes = Recipe.objects.in_bulk([match[0] for match in matches])
+        ingredients = Ingredient.objects.in_bulk({
+            ingredient_id for match in matches for ingredient_id in match[3]
+        })
+        result = []
+        for recipe_id, matched, total, missing in matches:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            recipe.matched = matched
+            recipe.total = total
+            recipe.missing = [ingredients[ingredient_id]
+                              for ingredient_id in missing
+                              if ingredient_id in ingredients]
+            result.append(recipe)
+        serializer = PantryRecipeSerializer(
+            result, many=True, context={'request': request})
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def related(self, request, pk):
+        recipes = Recipe.objects.filter(
+            related_to__recipe_id=pk
+        ).order_by('-related_to__score', '-id')
+        serializer = RecipeSerializer(
+            recipes[:settings.RELATED_RECIPES_TOP_K], many=True,
+            context={'request': request})
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='favorite',
+        permission_classes=[IsAuthenticated, ])
+    def favorite_many(self, request):
+        recipe_ids = self.get_recipe_ids(request)
+        if request.method == 'POST':
+            return self.add_many(
+                Favorite, request.user, recipe_ids,
+                on_change=sync_favorites)
+        return self.delete_many(Favorite, request.user, recipe_ids)
 
     @action(
         detail=True,
@@ -90,37 +267,83 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return self.add_to(ShoppingCart, request.user, pk)
         return self.delete_from(ShoppingCart, request.user, pk)
 
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
+        url_path='shopping_cart',
+        permission_classes=[IsAuthenticated, ])
+    def shopping_cart_many(self, request):
+        recipe_ids = self.get_recipe_ids(request)
+        if request.method == 'POST':
+            return self.add_many(
+                ShoppingCart, request.user, recipe_ids,
+                on_change=lambda user_id, recipe_ids: rebuild([user_id]))
+        return self.delete_many(ShoppingCart, request.user, recipe_ids)
+
     @action(
         detail=False,
         methods=['get'],
         permission_classes=[IsAuthenticated, ])
+    def shopping_cart_summary(self, request):
+        ingredients = request.user.shopping_cart_ingredients.select_related(
+            'ingredient').order_by('ingredient__name')
+        serializer = ShoppingCartIngredientSerializer(ingredients, many=True)
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated, ],
+        renderer_classes=SHOPPING_LIST_RENDERERS,
+        content_negotiation_class=ShoppingListContentNegotiation)
     def download_shopping_cart(self, request):
         user = request.user
         if not user.shopping_cart.exists():
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
-
-        today = datetime.today()
-        shopping_list = (
-            f'Список покупок для: {user.get_full_name()}\n\n'
-            f'Дата: {today:%Y-%m-%d}\n\n'
+        ingredients = shopping_list(user)
+
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(
+            renderer.stream(user, ingredients.iterator(), datetime.today()),
+            content_type=content_type
         )
-        shopping_list += '\n'.join([
-            f'- {ingredient["ingredient__name"]} '
-            f'({ingredient["ingredient__measurement_unit"]})'
-            f' - {ingredient["amount"]}'
-            for ingredient in ingredients
-        ])
-        shopping_list += f'\n\nFoodgram ({today:%Y})'
-
-        filename = f'{user.username}_shopping_list.txt'
-        response = HttpResponse(shopping_list, content_type='text/plain')
+        filename = f'{user.username}_shopping_list.{renderer.format}'
         response['Content-Disposition'] = f'attachment; filename={filename}'
 
         return response
+
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAuthenticated, ])
+    def export_shopping_cart(self, request):
+        serializer = ShoppingListExportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        task = export_shopping_list.delay(
+            request.user.id, serializer.validated_data['format'],
+            user=request.user)
+        return Response(
+            TaskSerializer(task).data, status=status.HTTP_202_ACCEPTED)
+
+
+class TaskViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = TaskSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Task.objects.filter(user=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk):
+        task = self.get_object()
+        result = task.result if isinstance(task.result, dict) else {}
+        name = result.get('file')
+        if (task.status != Task.SUCCESS or not name
+                or not exports_storage.exists(name)):
+            raise Http404('Файл не найден или срок его хранения истек')
+        return FileResponse(
+            exports_storage.open(name), as_attachment=True, filename=name)
@@ -39,9 +39,11 @@ INSTALLED_APPS = [
     'api',
     'recipes',
     'users',
+    'tasks',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +88,14 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 AUTH_USER_MODEL = 'users.User'
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -133,7 +143,7 @@ DJOSER = {
         'current_user': 'api.serializers.UserGetSerializer',
     },
     'PERMISSIONS': {
-        'user_list': ['rest_framework.permissions.CurrentUserOrAdminOrReadOnly'],
+        'user_list': ['rest_framework.permissions.IsAuthenticatedOrReadOnly'],
         'user': ['djoser.permissions.CurrentUserOrAdminOrReadOnly'],
     }
 }
@@ -158,9 +168,75 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/app/media/'
 
+EXPORTS_ROOT = os.getenv('EXPORTS_ROOT', '/app/exports/')
+
+EXPORTS_TTL = 24 * 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 EMPTY_VALUE = '-пусто-'
+
+RECIPES_LIMIT_MAX = 100
+
+RECIPES_BULK_MAX = 500
+
+RELATED_RECIPES_TOP_K = 10
+
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+
+FEED_BACKFILL = 100
+
+TRENDING_HALF_LIFE = 3 * 24 * 60 * 60
+
+METRICS_PATH_PREFIX = '/api/'
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+TRENDING_LAG = 60
+
+TRENDING_WEIGHTS = {
+    'favorite': 1.0,
+    'shopping_cart': 0.5,
+}
+
+INGREDIENT_INDEX_TTL = 300
+
+PANTRY_INDEX_TTL = 300
+
+CATALOG_PAYLOAD_TTL = 300
+
+RECIPE_FRAGMENT_TTL = 600
+
+RECIPE_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+
+RECIPE_IMAGE_MAX_PIXELS = 4096 * 4096
+
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (320, 320),
+    'medium': (960, 960),
+}
+
+TASKS_ALWAYS_EAGER = (
+    str(os.getenv('TASKS_ALWAYS_EAGER', 'False')).lower() == 'true')
+
+TASKS_RETRY_DELAY = 5
+
+TASKS_STALE_AFTER = 60 * 60
+
+TASKS_SCHEDULE_INTERVAL = 10
+
+TASKS_PERIODIC = {
+    'recipes.tasks.update_trending_scores': 5 * 60,
+    'recipes.tasks.build_related_recipes': 60 * 60,
+    'api.tasks.purge_exports': 60 * 60,
+    'recipes.tasks.recount_counters': 24 * 60 * 60,
+}
+
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'russian')
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
@@ -3,8 +3,11 @@ from django.contrib import admin
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
+from recipes.autocomplete import ingredient_index
+from recipes.catalog import bump_version
 from recipes.models import (Favorite, Ingredient, Recipe,
-                            RecipeIngredient, ShoppingCart, Tag)
+                            RecipeIngredient, ShoppingCart,
+                            ShoppingCartIngredient, Tag)
 
 
 class IngredientResource(resources.ModelResource):
@@ -12,6 +15,14 @@ class IngredientResource(resources.ModelResource):
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit',)
 
+    def after_import(self, dataset, result, using_transactions, dry_run,
+                     **kwargs):
+        super().after_import(
+            dataset, result, using_transactions, dry_run, **kwargs)
+        if not dry_run:
+            ingredient_index.invalidate()
+            bump_version('ingredients')
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
@@ -36,7 +47,7 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'author', 'favorites_amount')
+    list_display = ('pk', 'name', 'author', 'favorites_count', 'trending_score')
     search_fields = ('name', 'author')
     list_filter = ('name', 'author', 'tags')
     empty_value_display = settings.EMPTY_VALUE
@@ -44,9 +55,6 @@ class RecipeAdmin(admin.ModelAdmin):
         RecipeIngredientInline,
     ]
 
-    def favorites_amount(self, obj):
-        return obj.favorites.count()
-
 
 @admin.register(RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
@@ -56,13 +64,20 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'user', 'recipe')
+    list_display = ('pk', 'user', 'recipe', 'created')
     search_fields = ('user', 'recipe')
     empty_value_display = settings.EMPTY_VALUE
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'user', 'recipe')
+    list_display = ('pk', 'user', 'recipe', 'created')
     search_fields = ('user', 'recipe')
     empty_value_display = settings.EMPTY_VALUE
+
+
+@admin.register(ShoppingCartIngredient)
+class ShoppingCartIngredientAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'ingredient', 'amount')
+    search_fields = ('user__username', 'ingredient__name')
+    empty_value_display = settings.EMPTY_VALUE
@@ -0,0 +1,71 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from django.conf import settings
+
+from .models import Ingredient
+
+
+class IngredientIndex:
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = Lock()
+        self._snapshot = None
+        self._generation = 0
+
+    def invalidate(self):
+        self._generation += 1
+        self._snapshot = None
+
+    def build(self):
+        rows = Ingredient.objects.values(
+            'id', 'name', 'measurement_unit')
+        entries = tuple(sorted(
+            ((row['name'].lower(), row['id'], row) for row in rows),
+            key=lambda entry: entry[:2],
+        ))
+        return (tuple(entry[0] for entry in entries), entries,
+                time.monotonic())
+
+    def _is_fresh(self, snapshot):
+        return snapshot is not None and (
+            self.ttl is None or time.monotonic() - snapshot[2] <= self.ttl)
+
+    def _ensure_built(self):
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+            generation = self._generation
+            snapshot = self.build()
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def search(self, query, limit=None):
+        keys, entries, _ = self._ensure_built()
+        query = query.strip().lower()
+        if not query:
+            return [entry[2] for entry in entries[:limit]]
+        result = []
+        for position in range(bisect_left(keys, query), len(entries)):
+            key, _, row = entries[position]
+            if not key.startswith(query) or len(result) == limit:
+                break
+            result.append(row)
+        if limit is not None and len(result) >= limit:
+            return result
+        for key, _, row in entries:
+            if query in key and not key.startswith(query):
+                result.append(row)
+                if len(result) == limit:
+                    break
+        return result
+
+
+ingredient_index = IngredientIndex(ttl=settings.INGREDIENT_INDEX_TTL)
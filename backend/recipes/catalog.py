@@ -0,0 +1,18 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'catalog-version:{}'
+
+
+def get_version(name):
+    version = cache.get(VERSION_KEY.format(name))
+    if version is None:
+        version = time.time()
+        cache.add(VERSION_KEY.format(name), version, timeout=None)
+        version = cache.get(VERSION_KEY.format(name), version)
+    return version
+
+
+def bump_version(name):
+    cache.set(VERSION_KEY.format(name), time.time(), timeout=None)
@@ -0,0 +1,85 @@
+from heapq import merge
+
+from django.conf import settings
+
+from users.models import Subscribe, User
+from .models import FeedEntry, Recipe
+
+
+def fans_out(author):
+    return author.followers_count <= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out(recipe):
+    if recipe.author_id is None or not fans_out(recipe.author):
+        return 0
+    follower_ids = Subscribe.objects.filter(
+        author_id=recipe.author_id).values_list('user_id', flat=True)
+    entries = FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=user_id, author_id=recipe.author_id,
+                   recipe_id=recipe.id)
+         for user_id in follower_ids.iterator()],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return len(entries)
+
+
+def recent_recipe_ids(author_id):
+    return list(Recipe.objects.filter(author_id=author_id).order_by(
+        '-id').values_list('id', flat=True)[:settings.FEED_BACKFILL])
+
+
+def backfill(user_id, author_id):
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=user_id, author_id=author_id, recipe_id=recipe_id)
+         for recipe_id in recent_recipe_ids(author_id)],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_followers(author_id):
+    recipe_ids = recent_recipe_ids(author_id)
+    follower_ids = Subscribe.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    entries = FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=user_id, author_id=author_id, recipe_id=recipe_id)
+         for user_id in follower_ids.iterator()
+         for recipe_id in recipe_ids],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return len(entries)
+
+
+def drop_author(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def feed_ids(user, before, limit):
+    timeline = FeedEntry.objects.filter(user=user)
+    popular = Recipe.objects.filter(author__in=User.objects.filter(
+        subscribing__user=user,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ))
+    if before is not None:
+        timeline = timeline.filter(recipe_id__lt=before)
+        popular = popular.filter(id__lt=before)
+    timeline = timeline.order_by('-recipe_id').values_list(
+        'recipe_id', flat=True)[:limit]
+    popular = popular.order_by('-id').values_list('id', flat=True)[:limit]
+    result = []
+    for recipe_id in merge(timeline, popular, reverse=True):
+        if not result or result[-1] != recipe_id:
+            result.append(recipe_id)
+    return result[:limit]
+
+
+def rebuild_feeds():
+    FeedEntry.objects.all().delete()
+    authors = User.objects.filter(
+        followers_count__gt=0,
+        followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values_list('id', flat=True)
+    for author_id in authors.iterator():
+        backfill_followers(author_id)
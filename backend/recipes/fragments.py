@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .catalog import get_version
+from .models import Recipe
+
+FRAGMENT_KEY = 'recipe-fragment:{}'
+
+
+def fragment_key(recipe_id):
+    return FRAGMENT_KEY.format(recipe_id)
+
+
+def fragment_stamp():
+    return get_version('tags'), get_version('ingredients')
+
+
+def cache_is_shared():
+    return not isinstance(
+        caches[DEFAULT_CACHE_ALIAS], (DummyCache, LocMemCache))
+
+
+def get_fragments(recipe_ids):
+    if not cache_is_shared():
+        return {}
+    stamp = fragment_stamp()
+    cached = cache.get_many([fragment_key(pk) for pk in recipe_ids])
+    fragments = {}
+    for recipe_id in recipe_ids:
+        entry = cached.get(fragment_key(recipe_id))
+        if entry is not None and entry[0] == stamp:
+            fragments[recipe_id] = entry[1]
+    return fragments
+
+
+def set_fragments(fragments):
+    if not cache_is_shared():
+        return
+    stamp = fragment_stamp()
+    cache.set_many(
+        {fragment_key(pk): (stamp, data) for pk, data in fragments.items()},
+        timeout=settings.RECIPE_FRAGMENT_TTL,
+    )
+
+
+def invalidate_recipes(recipe_ids):
+    keys = [fragment_key(pk) for pk in recipe_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_author(author_id):
+    invalidate_recipes(list(Recipe.objects.filter(
+        author_id=author_id).values_list('id', flat=True)))
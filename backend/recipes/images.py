@@ -0,0 +1,48 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .fragments import invalidate_recipes
+from .models import Recipe
+
+VARIANTS_DIR = 'images/variants'
+FORMATS = (('JPEG', 'jpg', ''), ('WEBP', 'webp', '_webp'))
+
+
+def variant_name(image_name, variant, extension):
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return f'{VARIANTS_DIR}/{stem}_{variant}.{extension}'
+
+
+def make_variants(image_name):
+    with default_storage.open(image_name) as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original = original.convert('RGB')
+    variants = {}
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail(size)
+        for image_format, extension, suffix in FORMATS:
+            buffer = BytesIO()
+            image.save(buffer, image_format, quality=85)
+            name = variant_name(image_name, variant, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            variants[f'{variant}{suffix}'] = default_storage.save(
+                name, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def process_recipe_image(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return {}
+    variants = make_variants(recipe.image.name)
+    Recipe.objects.filter(pk=recipe_id, image=recipe.image.name).update(
+        image_variants=variants)
+    invalidate_recipes([recipe_id])
+    return variants
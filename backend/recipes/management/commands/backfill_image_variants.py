@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import process_recipe_image
+from recipes.models import Recipe
+from recipes.tasks import backfill_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Создает уменьшенные варианты картинок существующих рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать варианты и для уже обработанных рецептов')
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help='Поставить обработку в очередь фоновых задач')
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            task = backfill_image_variants.delay(force=options['force'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Задача {task.pk} поставлена в очередь'))
+            return
+        recipes = Recipe.objects.exclude(image='')
+        if not options['force']:
+            recipes = recipes.filter(image_variants={})
+        processed = failed = 0
+        for recipe_id in recipes.values_list('id', flat=True).iterator():
+            try:
+                process_recipe_image(recipe_id)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+            else:
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано: {processed}, с ошибками: {failed}'))
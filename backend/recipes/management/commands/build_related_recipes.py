@@ -0,0 +1,27 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.related import build_related, refresh_related
+
+
+class Command(BaseCommand):
+    help = 'Рассчитывает похожие рецепты по совместному избранному'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Пересчитать только рецепты с изменениями в избранном')
+        parser.add_argument(
+            '--top-k', type=int,
+            help='Количество похожих рецептов для каждого рецепта')
+
+    def handle(self, *args, **options):
+        try:
+            if options['incremental']:
+                count = refresh_related(options['top_k'])
+            else:
+                count = build_related(options['top_k'])
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие рецепты пересчитаны: {count}'))
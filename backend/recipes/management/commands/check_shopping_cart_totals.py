@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from recipes.shopping_cart import expected_totals, rebuild, stored_totals
+
+
+class Command(BaseCommand):
+    help = 'Сверяет агрегированные списки покупок с корзинами пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Пересобрать агрегаты, если найдены расхождения')
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Проверить только указанных пользователей')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        expected = expected_totals(user_ids)
+        stored = stored_totals(user_ids)
+        mismatches = sorted(
+            key for key in expected.keys() | stored.keys()
+            if expected.get(key) != stored.get(key)
+        )
+        for user_id, ingredient_id in mismatches:
+            self.stdout.write(
+                f'user={user_id} ingredient={ingredient_id}: '
+                f'stored={stored.get((user_id, ingredient_id))} '
+                f'expected={expected.get((user_id, ingredient_id))}'
+            )
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        if options['fix']:
+            rebuild(user_ids)
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересобрано, исправлено расхождений: {len(mismatches)}'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'Найдено расхождений: {len(mismatches)}'))
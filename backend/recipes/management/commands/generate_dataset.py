@@ -0,0 +1,195 @@
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from recipes.catalog import bump_version
+from recipes.counters import recount
+from recipes.feed import rebuild_feeds
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag)
+from recipes.search import rebuild_search_index
+from recipes.shopping_cart import rebuild
+from recipes.trending import update_trending
+from users.models import Subscribe, User
+
+TAGS = (
+    ('Завтрак', 'breakfast', '#E26C2D'),
+    ('Обед', 'lunch', '#49B64E'),
+    ('Ужин', 'dinner', '#8775D2'),
+    ('Десерт', 'dessert', '#F2C94C'),
+    ('Выпечка', 'bakery', '#B5651D'),
+)
+WORDS = (
+    'суп', 'салат', 'пирог', 'каша', 'рагу', 'запеканка', 'омлет',
+    'паста', 'борщ', 'плов', 'сырники', 'блины', 'котлеты', 'торт',
+)
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def popularity(count):
+    return list(accumulate(1 / (rank + 1) for rank in range(count)))
+
+
+class Command(BaseCommand):
+    help = 'Создает воспроизводимый синтетический набор данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--subscriptions', type=int, default=20,
+                            help='Подписок на пользователя')
+        parser.add_argument('--favorites', type=int, default=30,
+                            help='Избранных рецептов на пользователя')
+        parser.add_argument('--cart', type=int, default=5,
+                            help='Рецептов в корзине на пользователя')
+        parser.add_argument('--ingredients', type=int, default=8,
+                            help='Ингредиентов на рецепт')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+        tag_bits = self.create_tags()
+        ingredient_ids = self.load_ingredients()
+        user_ids = self.create_users(options['users'])
+        self.create_subscriptions(user_ids, options['subscriptions'])
+        recipe_ids = self.create_recipes(
+            user_ids, options['recipes'], tag_bits, ingredient_ids,
+            options['ingredients'])
+        self.create_relations(
+            Favorite, user_ids, recipe_ids, options['favorites'])
+        self.create_relations(
+            ShoppingCart, user_ids, recipe_ids, options['cart'])
+        self.rebuild_derived()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'))
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    def reset_sequences(self, *models):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+    def create_tags(self):
+        for name, slug, color in TAGS:
+            if not Tag.objects.filter(slug=slug).exists():
+                Tag.objects.create(name=name, slug=slug, color=color)
+        return dict(Tag.objects.values_list('id', 'bit'))
+
+    def load_ingredients(self):
+        if not Ingredient.objects.exists():
+            call_command('import_ingredients', 'data/ingredients.json',
+                         stdout=self.stdout)
+        return list(Ingredient.objects.order_by('id').values_list(
+            'id', flat=True))
+
+    def create_users(self, count):
+        first_id = next_id(User)
+        password = make_password('synthetic-password')
+        for start in range(0, count, self.batch_size):
+            User.objects.bulk_create([
+                User(id=user_id, username=f'synthetic{user_id}',
+                     email=f'synthetic{user_id}@example.com',
+                     first_name='Синтетический', last_name=str(user_id),
+                     password=password)
+                for user_id in range(
+                    first_id + start,
+                    first_id + min(start + self.batch_size, count))
+            ])
+        self.reset_sequences(User)
+        self.log(f'Пользователи: {count}')
+        return list(range(first_id, first_id + count))
+
+    def create_subscriptions(self, user_ids, per_user):
+        weights = popularity(len(user_ids))
+        rows = []
+        for user_id in user_ids:
+            authors = set(self.rng.choices(
+                user_ids, cum_weights=weights, k=per_user))
+            authors.discard(user_id)
+            rows.extend(Subscribe(user_id=user_id, author_id=author_id)
+                        for author_id in authors)
+            if len(rows) >= self.batch_size:
+                Subscribe.objects.bulk_create(rows)
+                rows = []
+        Subscribe.objects.bulk_create(rows)
+        self.log('Подписки созданы')
+
+    def create_recipes(self, user_ids, count, tag_bits, ingredient_ids,
+                       per_recipe):
+        first_id = next_id(Recipe)
+        tag_ids = list(tag_bits)
+        weights = popularity(len(user_ids))
+        RecipeTag = Recipe.tags.through
+        for start in range(0, count, self.batch_size):
+            recipes, recipe_tags, recipe_ingredients = [], [], []
+            end = min(start + self.batch_size, count)
+            for recipe_id in range(first_id + start, first_id + end):
+                tags = self.rng.sample(
+                    tag_ids, self.rng.randint(1, min(3, len(tag_ids))))
+                mask = 0
+                for tag_id in tags:
+                    mask |= 1 << tag_bits[tag_id]
+                    recipe_tags.append(
+                        RecipeTag(recipe_id=recipe_id, tag_id=tag_id))
+                recipes.append(Recipe(
+                    id=recipe_id,
+                    author_id=self.rng.choices(
+                        user_ids, cum_weights=weights)[0],
+                    name=f'{self.rng.choice(WORDS)} №{recipe_id}',
+                    text=' '.join(self.rng.choices(WORDS, k=30)),
+                    cooking_time=self.rng.randint(5, 180),
+                    tags_mask=mask,
+                ))
+                recipe_ingredients.extend(
+                    RecipeIngredient(recipe_id=recipe_id,
+                                     ingredient_id=ingredient_id,
+                                     amount=self.rng.randint(1, 500))
+                    for ingredient_id in self.rng.sample(
+                        ingredient_ids, per_recipe))
+            with transaction.atomic():
+                Recipe.objects.bulk_create(recipes)
+                RecipeTag.objects.bulk_create(recipe_tags)
+                RecipeIngredient.objects.bulk_create(
+                    recipe_ingredients, batch_size=self.batch_size)
+            self.log(f'Рецепты: {end}/{count}')
+        self.reset_sequences(Recipe)
+        return list(range(first_id, first_id + count))
+
+    def create_relations(self, model, user_ids, recipe_ids, per_user):
+        weights = popularity(len(recipe_ids))
+        rows = []
+        for user_id in user_ids:
+            rows.extend(
+                model(user_id=user_id, recipe_id=recipe_id)
+                for recipe_id in set(self.rng.choices(
+                    recipe_ids, cum_weights=weights, k=per_user)))
+            if len(rows) >= self.batch_size:
+                model.objects.bulk_create(rows)
+                rows = []
+        model.objects.bulk_create(rows)
+        self.log(f'{model.__name__}: готово')
+
+    def rebuild_derived(self):
+        recount()
+        rebuild()
+        rebuild_search_index()
+        rebuild_feeds()
+        update_trending(full=True)
+        bump_version('tags')
+        bump_version('ingredients')
+        self.log('Счетчики, корзины, поиск, ленты и популярность обновлены')
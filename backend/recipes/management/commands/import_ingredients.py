@@ -0,0 +1,203 @@
+import csv
+import io
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.autocomplete import ingredient_index
+from recipes.catalog import bump_version
+from recipes.models import Ingredient
+
+CHUNK_SIZE = 64 * 1024
+
+
+MAX_LENGTHS = {
+    field: Ingredient._meta.get_field(field).max_length
+    for field in ('name', 'measurement_unit')
+}
+
+
+def check_lengths(position, name, measurement_unit):
+    for field, value in zip(MAX_LENGTHS, (name, measurement_unit)):
+        if len(value.strip()) > MAX_LENGTHS[field]:
+            raise CommandError(
+                f'{position}: поле {field} длиннее '
+                f'{MAX_LENGTHS[field]} символов')
+    return name, measurement_unit
+
+
+class JSONArrayReader:
+    unterminated = 'Некорректный JSON: массив не закрыт'
+
+    def __init__(self, file):
+        self.file = file
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.eof = False
+
+    def read(self):
+        chunk = self.file.read(CHUNK_SIZE)
+        self.eof = not chunk
+        self.buffer += chunk
+
+    def peek(self, message):
+        self.buffer = self.buffer.lstrip()
+        while not self.buffer:
+            if self.eof:
+                raise CommandError(message)
+            self.read()
+            self.buffer = self.buffer.lstrip()
+        return self.buffer[0]
+
+    def take(self, char, message):
+        if self.peek(message) != char:
+            raise CommandError(message)
+        self.buffer = self.buffer[1:]
+
+    def decode(self):
+        self.peek(self.unterminated)
+        while True:
+            try:
+                item, end = self.decoder.raw_decode(self.buffer)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise CommandError('Некорректный JSON')
+                self.read()
+                continue
+            self.buffer = self.buffer[end:]
+            return item
+
+    def __iter__(self):
+        self.take('[', 'Ожидается JSON-массив объектов')
+        if self.peek(self.unterminated) != ']':
+            while True:
+                yield self.decode()
+                if self.peek(self.unterminated) == ']':
+                    break
+                self.take(',', 'Некорректный JSON: ожидается "," или "]"')
+        self.buffer = self.buffer[1:]
+        if (self.buffer + self.file.read(CHUNK_SIZE)).strip():
+            raise CommandError('Некорректный JSON: данные после массива')
+
+
+def iter_json(file):
+    for number, item in enumerate(JSONArrayReader(file), 1):
+        if not isinstance(item, dict) or not all(
+                isinstance(item.get(key), str) and item[key].strip()
+                for key in ('name', 'measurement_unit')):
+            raise CommandError(
+                f'Элемент {number}: ожидается объект с непустыми '
+                f'полями name и measurement_unit')
+        yield check_lengths(
+            f'Элемент {number}', item['name'], item['measurement_unit'])
+
+
+def iter_csv(file):
+    reader = csv.reader(file)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != 2 or not all(value.strip() for value in row):
+            raise CommandError(
+                f'Строка {reader.line_num}: ожидается два непустых '
+                f'столбца, название и единица измерения')
+        yield check_lengths(f'Строка {reader.line_num}', *row)
+
+
+def batches(rows, size):
+    batch = []
+    for name, measurement_unit in rows:
+        batch.append((name.strip(), measurement_unit.strip()))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Загружает ингредиенты из JSON или CSV файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу с ингредиентами')
+        parser.add_argument(
+            '--format', choices=('json', 'csv'),
+            help='Формат файла, по умолчанию определяется по расширению')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одной пачке')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('json', 'csv'):
+            raise CommandError('Поддерживаются только форматы json и csv')
+        reader = iter_json if file_format == 'json' else iter_csv
+        if connection.vendor == 'postgresql':
+            load = self.load_postgresql
+        else:
+            load = self.load_bulk_create
+        started = time.monotonic()
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            read, created = load(
+                batches(reader(file), options['batch_size']))
+            transaction.on_commit(self.invalidate)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано: {read}, добавлено: {created}, '
+            f'{elapsed:.2f} с, {read / max(elapsed, 1e-9):.0f} строк/с'))
+
+    def invalidate(self):
+        ingredient_index.invalidate()
+        bump_version('ingredients')
+
+    def report(self, read, created):
+        self.stdout.write(f'Прочитано: {read}, добавлено: {created}')
+
+    def load_bulk_create(self, batches):
+        existing = set(Ingredient.objects.values_list(
+            'name', 'measurement_unit'))
+        read = created = 0
+        for batch in batches:
+            read += len(batch)
+            new = []
+            for key in batch:
+                if key not in existing:
+                    existing.add(key)
+                    new.append(Ingredient(
+                        name=key[0], measurement_unit=key[1]))
+            Ingredient.objects.bulk_create(new)
+            created += len(new)
+            self.report(read, created)
+        return read, created
+
+    def load_postgresql(self, batches):
+        table = Ingredient._meta.db_table
+        read = created = 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredient_import '
+                '(name varchar(100), measurement_unit varchar(200)) '
+                'ON COMMIT DROP')
+            for batch in batches:
+                read += len(batch)
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.cursor.copy_expert(
+                    'COPY ingredient_import (name, measurement_unit) '
+                    'FROM STDIN WITH CSV', buffer)
+                cursor.execute(
+                    f'INSERT INTO {table} (name, measurement_unit) '
+                    f'SELECT DISTINCT name, measurement_unit '
+                    f'FROM ingredient_import AS new WHERE NOT EXISTS ('
+                    f'SELECT 1 FROM {table} AS old '
+                    f'WHERE old.name = new.name '
+                    f'AND old.measurement_unit = new.measurement_unit)')
+                created += cursor.rowcount
+                cursor.execute('TRUNCATE ingredient_import')
+                self.report(read, created)
+        return read, created
@@ -0,0 +1,328 @@
+import argparse
+import base64
+import io
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from recipes.management.commands.run_benchmarks import (git_commit,
+                                                        percentile)
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+MIX = {
+    'browse': 40,
+    'filtered_list': 25,
+    'favorite_toggle': 15,
+    'create_recipe': 5,
+    'download_cart': 15,
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in MIX or not weight.isdigit():
+            raise argparse.ArgumentTypeError(
+                f'Неверный элемент смеси: {item}')
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError('Все веса смеси нулевые')
+    return mix
+
+
+def image_data():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+class Client:
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.connection_class = (
+            HTTPSConnection if parts.scheme == 'https' else HTTPConnection)
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, data=None, token=None):
+        headers = {}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        if self.connection is None:
+            self.connection = self.connection_class(
+                self.host, timeout=self.timeout)
+        try:
+            self.connection.request(
+                method, self.prefix + path, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, HTTPException):
+            self.close()
+            raise
+        return response.status, content
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Worker(threading.Thread):
+    def __init__(self, number, runner):
+        super().__init__(daemon=True)
+        self.runner = runner
+        self.random = random.Random(runner.seed + number)
+        self.client = Client(runner.url, runner.timeout)
+        self.token = runner.tokens[number % len(runner.tokens)]
+        self.samples = []
+        self.created = []
+
+    def run(self):
+        names = list(self.runner.mix)
+        weights = list(self.runner.mix.values())
+        try:
+            while time.monotonic() < self.runner.deadline:
+                name = self.random.choices(names, weights)[0]
+                getattr(self, name)()
+        finally:
+            self.client.close()
+
+    def call(self, label, method, path, data=None, token=None,
+             expected=200):
+        started = time.monotonic()
+        try:
+            status, content = self.client.request(method, path, data, token)
+        except (OSError, HTTPException):
+            status, content = None, b''
+        elapsed = (time.monotonic() - started) * 1000
+        if isinstance(expected, int):
+            expected = (expected,)
+        if started >= self.runner.measure_from:
+            self.samples.append((label, elapsed, status in expected, status))
+        return status, content
+
+    def browse(self):
+        page = self.random.randint(1, 5)
+        self.call('GET /recipes/', 'GET', f'/api/recipes/?page={page}')
+        tag = self.random.choice(self.runner.tag_slugs)
+        self.call('GET /recipes/?tags', 'GET', f'/api/recipes/?tags={tag}')
+        recipe_id = self.random.choice(self.runner.recipe_ids)
+        self.call('GET /recipes/{id}/', 'GET', f'/api/recipes/{recipe_id}/')
+
+    def filtered_list(self):
+        name = self.random.choice(['is_favorited', 'is_in_shopping_cart'])
+        self.call(f'GET /recipes/?{name}', 'GET',
+                  f'/api/recipes/?{name}=1', token=self.token)
+
+    def favorite_toggle(self):
+        recipe_id = self.random.choice(self.runner.recipe_ids)
+        path = f'/api/recipes/{recipe_id}/favorite/'
+        status, _ = self.call('POST /recipes/{id}/favorite/', 'POST', path,
+                              token=self.token, expected=(201, 400))
+        if status in (201, 400):
+            self.call('DELETE /recipes/{id}/favorite/', 'DELETE', path,
+                      token=self.token, expected=204)
+        if status == 400:
+            self.call('POST /recipes/{id}/favorite/', 'POST', path,
+                      token=self.token, expected=201)
+
+    def create_recipe(self):
+        ingredients = self.random.sample(self.runner.ingredient_ids, 5)
+        status, content = self.call(
+            'POST /recipes/', 'POST', '/api/recipes/', {
+                'name': f'Нагрузочный рецепт {self.random.randrange(10**6)}',
+                'text': 'Создан нагрузочным тестом',
+                'cooking_time': self.random.randint(5, 120),
+                'image': self.runner.image,
+                'tags': self.random.sample(self.runner.tag_ids, 2),
+                'ingredients': [
+                    {'id': ingredient_id,
+                     'amount': self.random.randint(1, 500)}
+                    for ingredient_id in ingredients
+                ],
+            }, token=self.token, expected=201)
+        if status == 201:
+            self.created.append(json.loads(content)['id'])
+
+    def download_cart(self):
+        self.call('GET /recipes/download_shopping_cart/', 'GET',
+                  '/api/recipes/download_shopping_cart/', token=self.token)
+
+
+class Command(BaseCommand):
+    help = ('Нагружает запущенный сервер смешанным трафиком и выводит '
+            'пропускную способность и перцентили задержки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=60,
+                            help='Длительность замера в секундах')
+        parser.add_argument('--warmup', type=float, default=5,
+                            help='Прогрев в секундах, не входит в замер')
+        parser.add_argument('--users', type=int, default=50,
+                            help='Сколько синтетических пользователей '
+                                 'авторизовать')
+        parser.add_argument('--password', default='synthetic-password')
+        parser.add_argument(
+            '--mix', type=parse_mix, default=MIX,
+            help='Веса сценариев, например browse=40,create_recipe=5')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Сохранить отчет в JSON')
+        parser.add_argument('--keep', action='store_true',
+                            help='Не удалять созданные рецепты')
+
+    def handle(self, *args, **options):
+        self.url = options['url']
+        self.timeout = options['timeout']
+        self.seed = options['seed']
+        self.mix = options['mix']
+        self.prepare(options)
+        workers = [
+            Worker(number, self) for number in range(options['concurrency'])
+        ]
+        started = time.monotonic()
+        self.measure_from = started + options['warmup']
+        self.deadline = self.measure_from + options['duration']
+        self.stdout.write(
+            f'{options["concurrency"]} потоков, прогрев '
+            f'{options["warmup"]:g} с, замер {options["duration"]:g} с')
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - max(started, self.measure_from)
+        samples = [sample for worker in workers for sample in worker.samples]
+        report = {
+            'commit': git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'url': self.url,
+            'concurrency': options['concurrency'],
+            'duration_s': round(elapsed, 3),
+            'mix': self.mix,
+            'total': self.summarize(samples, elapsed),
+            'endpoints': {
+                label: self.summarize(rows, elapsed)
+                for label, rows in sorted(self.group(samples).items())
+            },
+        }
+        self.print_report(report)
+        if options['output']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(
+                json.dumps(report, ensure_ascii=False, indent=2))
+            self.stdout.write(self.style.SUCCESS(f'Отчет: {output}'))
+        if not options['keep']:
+            self.cleanup(workers)
+
+    def prepare(self, options):
+        users = User.objects.filter(
+            username__startswith='synthetic', shopping_cart__isnull=False
+        ).distinct().order_by('id').values_list(
+            'email', flat=True)[:options['users']]
+        self.recipe_ids = list(
+            Recipe.objects.order_by('?').values_list('id', flat=True)[:1000])
+        self.ingredient_ids = list(
+            Ingredient.objects.order_by('?').values_list(
+                'id', flat=True)[:1000])
+        tags = list(Tag.objects.values_list('id', 'slug'))
+        if not users or not self.recipe_ids or len(tags) < 2 or len(
+                self.ingredient_ids) < 5:
+            raise CommandError(
+                'Нет данных, сначала запустите generate_dataset')
+        self.tag_ids = [tag_id for tag_id, _ in tags]
+        self.tag_slugs = [slug for _, slug in tags]
+        self.image = image_data()
+        client = Client(self.url, self.timeout)
+        self.tokens = []
+        try:
+            for email in users:
+                status, content = client.request(
+                    'POST', '/api/auth/token/login/',
+                    {'email': email, 'password': options['password']})
+                if status != 200:
+                    raise CommandError(
+                        f'Не удалось войти как {email}: {status}')
+                self.tokens.append(json.loads(content)['auth_token'])
+        except (OSError, HTTPException) as error:
+            raise CommandError(f'Сервер {self.url} недоступен: {error}')
+        finally:
+            client.close()
+
+    def group(self, samples):
+        groups = defaultdict(list)
+        for sample in samples:
+            groups[sample[0]].append(sample)
+        return groups
+
+    def summarize(self, samples, elapsed):
+        if not samples:
+            return {'requests': 0}
+        timings = [sample[1] for sample in samples]
+        errors = defaultdict(int)
+        for _, _, ok, status in samples:
+            if not ok:
+                errors[str(status)] += 1
+        return {
+            'requests': len(samples),
+            'rps': round(len(samples) / elapsed, 2),
+            'error_rate': round(sum(errors.values()) / len(samples), 4),
+            'errors': dict(errors),
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'max_ms': round(max(timings), 3),
+        }
+
+    def print_report(self, report):
+        header = (f'{"":40} {"запросов":>8} {"rps":>8} {"ошибки":>7} '
+                  f'{"p50":>8} {"p95":>8} {"p99":>8}')
+        self.stdout.write(header)
+        rows = list(report['endpoints'].items()) + [
+            ('Всего', report['total'])]
+        for label, result in rows:
+            if not result['requests']:
+                continue
+            self.stdout.write(
+                f'{label:40} {result["requests"]:8} {result["rps"]:8.1f} '
+                f'{result["error_rate"]:7.2%} {result["p50_ms"]:8.1f} '
+                f'{result["p95_ms"]:8.1f} {result["p99_ms"]:8.1f}')
+
+    def cleanup(self, workers):
+        created = [
+            (worker.token, recipe_id)
+            for worker in workers for recipe_id in worker.created
+        ]
+        client = Client(self.url, self.timeout)
+        try:
+            for token, recipe_id in created:
+                client.request(
+                    'DELETE', f'/api/recipes/{recipe_id}/', token=token)
+        except (OSError, HTTPException) as error:
+            self.stderr.write(f'Не удалось удалить рецепты: {error}')
+        finally:
+            client.close()
+        if created:
+            self.stdout.write(f'Удалено созданных рецептов: {len(created)}')
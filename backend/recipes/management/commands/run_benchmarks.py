@@ -0,0 +1,134 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Subscribe, User
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время ответа и число запросов основных эндпоинтов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--output', help='Файл для результатов, по умолчанию '
+                             'benchmarks/<дата>-<коммит>.json')
+        parser.add_argument(
+            '--compare', help='Сравнить с сохраненными результатами')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(
+            shopping_cart__isnull=False, subscriber__isnull=False
+        ).order_by('id').first()
+        recipe = Recipe.objects.order_by('-favorites_count', '-id').first()
+        tag = Tag.objects.order_by('id').first()
+        ingredient = Ingredient.objects.order_by('id').first()
+        if None in (user, recipe, tag, ingredient):
+            raise CommandError(
+                'Нет данных, сначала запустите generate_dataset')
+        client = APIClient()
+        client.force_authenticate(user)
+        cases = {
+            'recipe_list': '/api/recipes/',
+            'recipe_list_cursor': '/api/recipes/?cursor=',
+            'recipe_list_tag': f'/api/recipes/?tags={tag.slug}',
+            'recipe_detail': f'/api/recipes/{recipe.id}/',
+            'subscriptions': '/api/users/subscriptions/',
+            'ingredient_search':
+                f'/api/ingredients/?name={ingredient.name[:3]}',
+            'download_shopping_cart':
+                '/api/recipes/download_shopping_cart/',
+        }
+        results = {
+            name: self.measure(client, url, options)
+            for name, url in cases.items()
+        }
+        report = {
+            'commit': git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'dataset': {
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+                'subscriptions': Subscribe.objects.count(),
+                'shopping_cart': ShoppingCart.objects.count(),
+            },
+            'results': results,
+        }
+        output = Path(options['output'] or (
+            f'benchmarks/{datetime.now():%Y%m%d-%H%M%S}-'
+            f'{report["commit"] or "local"}.json'))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        baseline = None
+        if options['compare']:
+            baseline = json.loads(
+                Path(options['compare']).read_text())['results']
+        for name, result in results.items():
+            line = (f'{name:24} p50 {result["p50_ms"]:8.2f} ms  '
+                    f'p95 {result["p95_ms"]:8.2f} ms  '
+                    f'queries {result["queries"]}')
+            if baseline and name in baseline:
+                line += (f'  ({result["p50_ms"] / baseline[name]["p50_ms"]:.2f}x'
+                         f', queries {baseline[name]["queries"]})')
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f'Результаты: {output}'))
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            self.request(client, url)
+        timings = []
+        queries = 0
+        for _ in range(options['repeat']):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                self.request(client, url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(context))
+        return {
+            'url': url,
+            'repeat': options['repeat'],
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'queries': queries,
+        }
+
+    def request(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: {response.status_code}')
+        if response.streaming:
+            b''.join(response.streaming_content)
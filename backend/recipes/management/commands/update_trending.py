@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from recipes.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает популярность рецептов за последнее время'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать с нуля по всей истории')
+
+    def handle(self, *args, **options):
+        count = update_trending(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлена популярность рецептов: {count}'))
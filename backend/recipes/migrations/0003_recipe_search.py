@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db import migrations
+
+POSTGRES_FORWARD = (
+    "ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('{config}'::regconfig, "
+    "coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('{config}'::regconfig, "
+    "coalesce(text, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX recipes_recipe_search_vector_idx "
+    "ON recipes_recipe USING gin (search_vector)",
+)
+POSTGRES_BACKWARD = (
+    "DROP INDEX IF EXISTS recipes_recipe_search_vector_idx",
+    "ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector",
+)
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE recipes_recipe_fts "
+    "USING fts5(name, text, tokenize='unicode61')",
+    "INSERT INTO recipes_recipe_fts (rowid, name, text) "
+    "SELECT id, name, text FROM recipes_recipe",
+)
+SQLITE_BACKWARD = (
+    "DROP TABLE IF EXISTS recipes_recipe_fts",
+)
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, ()):
+            schema_editor.execute(
+                sql.format(config=settings.SEARCH_CONFIG))
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD,
+                 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_BACKWARD,
+                 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.3 on 2026-10-18 02:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_ingredient_name_unit_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_recipes', to='recipes.recipe', verbose_name='Рецепт')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_to', to='recipes.recipe', verbose_name='Похожий рецепт')),
+            ],
+            options={
+                'verbose_name': 'Похожий рецепт',
+                'verbose_name_plural': 'Похожие рецепты',
+            },
+        ),
+        migrations.CreateModel(
+            name='FavoriteChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Изменение избранного',
+                'verbose_name_plural': 'Изменения избранного',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='relatedrecipe',
+            index=models.Index(fields=['recipe', '-score'], name='related_recipe_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedrecipe',
+            constraint=models.UniqueConstraint(fields=('recipe', 'related'), name='unique_related_recipe'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.3 on 2026-10-18 03:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_favorite_change_without_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingRemoval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=20, verbose_name='Событие')),
+                ('created', models.DateTimeField(verbose_name='Дата события')),
+                ('removed', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата отмены')),
+                ('recipe', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Отмененное событие популярности',
+                'verbose_name_plural': 'Отмененные события популярности',
+            },
+        ),
+    ]
@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Exists, OuterRef, Prefetch, Value
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from users.models import User
+from users.models import DerivedFieldsMixin, Subscribe, User
+
+TAG_BITS = 63
 
 
 class Tag(models.Model):
@@ -17,6 +21,11 @@ class Tag(models.Model):
         max_length=7,
         unique=True,
     )
+    bit = models.PositiveSmallIntegerField(
+        'Бит в маске тегов',
+        unique=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -25,6 +34,33 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def get_free_bit():
+        used = set(Tag.objects.values_list('bit', flat=True))
+        return next(
+            (bit for bit in range(TAG_BITS) if bit not in used), None)
+
+    def clean(self):
+        if self.bit is None and self.get_free_bit() is None:
+            raise ValidationError(
+                f'Можно создать не больше {TAG_BITS} тегов')
+
+    def save(self, *args, **kwargs):
+        if self.bit is not None:
+            return super().save(*args, **kwargs)
+        while True:
+            self.bit = self.get_free_bit()
+            if self.bit is None:
+                raise IntegrityError(
+                    f'Можно создать не больше {TAG_BITS} тегов')
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if not Tag.objects.filter(bit=self.bit).exists():
+                    self.bit = None
+                    raise
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -37,6 +73,12 @@ class Ingredient(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['name', 'measurement_unit'],
+                name='ingredient_name_unit_idx',
+            ),
+        ]
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
 
@@ -44,7 +86,35 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+
+    def with_flags(self, user):
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                author_is_subscribed=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            author_is_subscribed=Exists(Subscribe.objects.filter(
+                user=user, author=OuterRef('author'))),
+        )
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipeingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient')),
+        )
+
+
+class Recipe(DerivedFieldsMixin, models.Model):
     name = models.CharField('Название рецепта', max_length=200)
     text = models.TextField('Описание рецепта')
     image = models.ImageField(
@@ -52,6 +122,12 @@ class Recipe(models.Model):
         upload_to='images/',
         blank=True,
     )
+    image_variants = models.JSONField(
+        'Варианты картинки',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -76,9 +152,43 @@ class Recipe(models.Model):
         through='RecipeIngredient',
         verbose_name='Ингредиенты',
     )
+    favorites_count = models.PositiveIntegerField(
+        'Количество добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    tags_mask = models.BigIntegerField(
+        'Маска тегов',
+        default=0,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        'Популярность за последнее время',
+        default=0,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
+
+    derived_fields = ('image_variants', 'favorites_count', 'tags_mask',
+                      'trending_score')
 
     class Meta:
         ordering = ('-id',)
+        indexes = [
+            models.Index(
+                fields=['-favorites_count', '-id'],
+                name='recipe_popularity_idx',
+            ),
+            models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_idx',
+            ),
+            models.Index(
+                fields=['-trending_score', '-id'],
+                name='recipe_trending_idx',
+            ),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -138,6 +248,8 @@ class Favorite(models.Model):
         on_delete=models.CASCADE,
         related_name='favorites',
     )
+    created = models.DateTimeField(
+        'Дата добавления', auto_now_add=True, db_index=True)
 
     class Meta:
         constraints = [
@@ -159,6 +271,8 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         verbose_name='Рецепт'
     )
+    created = models.DateTimeField(
+        'Дата добавления', auto_now_add=True, db_index=True)
 
     class Meta:
         ordering = ['-id']
@@ -173,3 +287,142 @@ class ShoppingCart(models.Model):
     def __str__(self):
         return (f'{self.user.username} добавил'
                 f'{self.recipe.name} в список покупок')
+
+
+class RelatedRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='related_recipes',
+        verbose_name='Рецепт',
+    )
+    related = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='related_to',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'related'], name='unique_related_recipe'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='related_recipe_score_idx',
+            ),
+        ]
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+
+
+class FavoriteChange(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Пользователь',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Рецепт',
+    )
+
+    class Meta:
+        verbose_name = 'Изменение избранного'
+        verbose_name_plural = 'Изменения избранного'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рецепт',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_entry'
+            )
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+
+class TrendingRemoval(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Рецепт',
+    )
+    event = models.CharField('Событие', max_length=20)
+    created = models.DateTimeField('Дата события')
+    removed = models.DateTimeField(
+        'Дата отмены', auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Отмененное событие популярности'
+        verbose_name_plural = 'Отмененные события популярности'
+
+
+class TrendingState(models.Model):
+    epoch = models.DateTimeField('Точка отсчета')
+    processed_until = models.DateTimeField('Учтены события до')
+
+    class Meta:
+        verbose_name = 'Состояние расчета популярности'
+        verbose_name_plural = 'Состояние расчета популярности'
+
+
+class ShoppingCartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_ingredients',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField('Количество')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_user_cart_ingredient'
+            )
+        ]
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списков покупок'
+
+    def __str__(self):
+        return (f'{self.user.username}: {self.ingredient.name} '
+                f'({self.ingredient.measurement_unit}) - {self.amount}')
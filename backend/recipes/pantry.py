@@ -0,0 +1,197 @@
+import time
+from collections import defaultdict
+from threading import Lock
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import RecipeIngredient
+
+
+def bitset(slots, size):
+    bitmap = bytearray(size // 8 + 1)
+    for slot in slots:
+        bitmap[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(bitmap, 'little')
+
+
+class PantryIndex:
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = Lock()
+        self._build_lock = Lock()
+        self._dirty = None
+        self._slots = None
+        self._recipe_ids = []
+        self._ingredients = {}
+        self._postings = {}
+        self._by_size = {}
+        self._built_at = 0
+
+    def invalidate(self):
+        self._built_at = None
+
+    def _add(self, recipe_id, ingredient_ids):
+        slot = self._slots.get(recipe_id)
+        if slot is None:
+            slot = self._slots[recipe_id] = len(self._recipe_ids)
+            self._recipe_ids.append(recipe_id)
+        bit = 1 << slot
+        ingredient_ids = tuple(set(ingredient_ids))
+        for ingredient_id in ingredient_ids:
+            self._postings[ingredient_id] = (
+                self._postings.get(ingredient_id, 0) | bit)
+        size = len(ingredient_ids)
+        self._by_size[size] = self._by_size.get(size, 0) | bit
+        self._ingredients[recipe_id] = ingredient_ids
+
+    def _remove(self, recipe_id):
+        ingredient_ids = self._ingredients.pop(recipe_id, None)
+        if ingredient_ids is None:
+            return
+        mask = ~(1 << self._slots[recipe_id])
+        for ingredient_id in ingredient_ids:
+            self._postings[ingredient_id] &= mask
+        self._by_size[len(ingredient_ids)] &= mask
+
+    def _read(self, recipe_ids=None):
+        rows = RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient_id').order_by('recipe_id')
+        if recipe_ids is not None:
+            rows = rows.filter(recipe_id__in=recipe_ids)
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in rows.iterator():
+            ingredients[recipe_id].append(ingredient_id)
+        return ingredients
+
+    def build(self):
+        with self._lock:
+            self._dirty = set()
+        ingredients = self._read()
+        postings = defaultdict(list)
+        by_size = defaultdict(list)
+        slots = {}
+        recipe_ids = []
+        for recipe_id, ingredient_ids in ingredients.items():
+            ingredients[recipe_id] = ingredient_ids = tuple(
+                set(ingredient_ids))
+            slots[recipe_id] = len(recipe_ids)
+            recipe_ids.append(recipe_id)
+            for ingredient_id in ingredient_ids:
+                postings[ingredient_id].append(slots[recipe_id])
+            by_size[len(ingredient_ids)].append(slots[recipe_id])
+        size = len(recipe_ids)
+        postings = {
+            ingredient_id: bitset(members, size)
+            for ingredient_id, members in postings.items()
+        }
+        by_size = {
+            length: bitset(members, size)
+            for length, members in by_size.items()
+        }
+        with self._lock:
+            self._slots = slots
+            self._recipe_ids = recipe_ids
+            self._ingredients = dict(ingredients)
+            self._postings = postings
+            self._by_size = by_size
+            self._built_at = time.monotonic()
+            dirty, self._dirty = self._dirty, None
+        if dirty:
+            self.refresh(dirty)
+
+    def refresh(self, recipe_ids):
+        if self._slots is None and self._dirty is None:
+            return
+        ingredients = self._read(recipe_ids)
+        with self._lock:
+            if self._dirty is not None:
+                self._dirty.update(recipe_ids)
+            if self._slots is None:
+                return
+            for recipe_id in recipe_ids:
+                self._remove(recipe_id)
+                if ingredients.get(recipe_id):
+                    self._add(recipe_id, ingredients[recipe_id])
+
+    def _ensure_built(self):
+        if self._slots is None:
+            with self._build_lock:
+                if self._slots is None:
+                    self.build()
+            return
+        expired = self._built_at is None or (
+            self.ttl is not None
+            and time.monotonic() - self._built_at > self.ttl)
+        if expired and self._build_lock.acquire(blocking=False):
+            try:
+                self.build()
+            finally:
+                self._build_lock.release()
+
+    def _count_hits(self, ingredient_ids):
+        planes = []
+        for ingredient_id in ingredient_ids:
+            carry = self._postings.get(ingredient_id, 0)
+            for position, plane in enumerate(planes):
+                if not carry:
+                    break
+                planes[position], carry = plane ^ carry, plane & carry
+            if carry:
+                planes.append(carry)
+        return planes
+
+    def _equal(self, planes, value, universe):
+        if value >> len(planes):
+            return 0
+        result = universe
+        for position, plane in enumerate(planes):
+            result &= plane if value >> position & 1 else ~plane
+        return result
+
+    def search(self, ingredient_ids, limit, max_missing=None):
+        pantry = set(ingredient_ids)
+        self._ensure_built()
+        with self._lock:
+            planes = self._count_hits(pantry)
+            universe = 0
+            for plane in planes:
+                universe |= plane
+            sizes = sorted(self._by_size, reverse=True)
+            if max_missing is None:
+                max_missing = sizes[0] if sizes else 0
+            equal = {}
+            found = []
+            for missing in range(max_missing + 1):
+                if len(found) == limit:
+                    break
+                for size in sizes:
+                    hits = size - missing
+                    if hits <= 0:
+                        continue
+                    if hits not in equal:
+                        equal[hits] = self._equal(planes, hits, universe)
+                    bits = self._by_size[size] & equal[hits]
+                    while bits and len(found) < limit:
+                        slot = bits.bit_length() - 1
+                        bits ^= 1 << slot
+                        found.append((self._recipe_ids[slot], hits, size))
+            return [
+                (recipe_id, hits, size, [
+                    ingredient_id
+                    for ingredient_id in self._ingredients[recipe_id]
+                    if ingredient_id not in pantry
+                ])
+                for recipe_id, hits, size in found
+            ]
+
+
+def refresh_pantry(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: pantry_index.refresh(recipe_ids))
+
+
+# Индекс живет в памяти процесса: изменения рецептов применяются к нему
+# сразу, а другие процессы увидят их после пересборки через PANTRY_INDEX_TTL.
+pantry_index = PantryIndex(ttl=settings.PANTRY_INDEX_TTL)
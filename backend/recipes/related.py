@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .models import Favorite, FavoriteChange, Recipe, RelatedRecipe
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+
+
+def log_favorite_changes(user_id, recipe_ids):
+    FavoriteChange.objects.bulk_create([
+        FavoriteChange(user_id=user_id, recipe_id=recipe_id)
+        for recipe_id in recipe_ids
+    ])
+
+
+def favorites_matrix(favorites):
+    pairs = np.array(
+        list(favorites.values_list('user_id', 'recipe_id')), dtype=np.int64
+    ).reshape(-1, 2)
+    _, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    recipe_ids, recipe_index = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (user_index, recipe_index)),
+        shape=(user_index.max(initial=-1) + 1, len(recipe_ids)),
+    )
+    return recipe_ids, matrix
+
+
+def neighbours(recipe_ids, matrix, targets, counts, top_k):
+    scores = (matrix[:, targets].T @ matrix).tocsr()
+    rows = np.repeat(targets, np.diff(scores.indptr))
+    scores.data /= np.sqrt(counts[rows] * counts[scores.indices])
+    scores.data[scores.indices == rows] = 0
+    scores.eliminate_zeros()
+    for row, target in enumerate(targets):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        columns = scores.indices[start:end]
+        values = scores.data[start:end]
+        if len(values) > top_k:
+            best = np.argpartition(-values, top_k)[:top_k]
+            columns, values = columns[best], values[best]
+        for column, value in zip(columns, values):
+            yield RelatedRecipe(
+                recipe_id=int(recipe_ids[target]),
+                related_id=int(recipe_ids[column]),
+                score=float(value),
+            )
+
+
+@transaction.atomic
+def build_related(top_k=None):
+    if np is None:
+        raise ImproperlyConfigured('Для расчета нужны numpy и scipy')
+    top_k = top_k or settings.RELATED_RECIPES_TOP_K
+    last_change = FavoriteChange.objects.aggregate(last=Max('id'))['last']
+    recipe_ids, matrix = favorites_matrix(Favorite.objects.all())
+    counts = np.asarray(matrix.sum(axis=0), dtype=np.float64).ravel()
+    RelatedRecipe.objects.all().delete()
+    RelatedRecipe.objects.bulk_create(
+        neighbours(recipe_ids, matrix, np.arange(len(recipe_ids)),
+                   counts, top_k),
+        batch_size=1000,
+    )
+    if last_change is not None:
+        FavoriteChange.objects.filter(id__lte=last_change).delete()
+    return len(recipe_ids)
+
+
+@transaction.atomic
+def refresh_related(top_k=None):
+    if np is None:
+        raise ImproperlyConfigured('Для расчета нужны numpy и scipy')
+    top_k = top_k or settings.RELATED_RECIPES_TOP_K
+    changes = FavoriteChange.objects.all()
+    last_change = changes.aggregate(last=Max('id'))['last']
+    if last_change is None:
+        return 0
+    changes = changes.filter(id__lte=last_change)
+    changed = changes.values('recipe_id')
+    stale = set(Favorite.objects.filter(
+        Q(user_id__in=changes.values('user_id'))
+        | Q(user_id__in=Favorite.objects.filter(
+            recipe_id__in=changed).values('user_id'))
+    ).values_list('recipe_id', flat=True))
+    stale.update(changed.values_list('recipe_id', flat=True))
+    recipe_ids, matrix = favorites_matrix(Favorite.objects.filter(
+        user_id__in=Favorite.objects.filter(
+            recipe_id__in=stale).values('user_id')))
+    counts = dict(Recipe.objects.filter(id__in=recipe_ids).values_list(
+        'id', 'favorites_count'))
+    counts = np.array(
+        [max(counts.get(recipe_id, 0), 1) for recipe_id in recipe_ids],
+        dtype=np.float64)
+    RelatedRecipe.objects.filter(recipe_id__in=stale).delete()
+    RelatedRecipe.objects.bulk_create(
+        neighbours(recipe_ids, matrix,
+                   np.flatnonzero(np.isin(recipe_ids, list(stale))),
+                   counts, top_k),
+        batch_size=1000,
+    )
+    changes.delete()
+    return len(stale)
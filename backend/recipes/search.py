@@ -0,0 +1,74 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.fields import FloatField
+
+FTS_TABLE = 'recipes_recipe_fts'
+TOKEN_RE = re.compile(r'\w+')
+
+
+def fts5_query(query):
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(query))
+
+
+def search_recipes(queryset, query):
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+        params = (settings.SEARCH_CONFIG, query)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT id FROM recipes_recipe '
+            f'WHERE search_vector @@ {tsquery}', params,
+        )).annotate(search_rank=RawSQL(
+            f'ts_rank(recipes_recipe.search_vector, {tsquery})', params,
+            output_field=FloatField(),
+        )).order_by('-search_rank', '-id')
+    if vendor == 'sqlite':
+        match = fts5_query(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,),
+        )).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid = recipes_recipe.id',
+            (match,),
+            output_field=FloatField(),
+        )).order_by('-search_rank', '-id')
+    return queryset.filter(Q(name__icontains=query) | Q(text__icontains=query))
+
+
+def update_search_index(recipe):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (recipe.id,))
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+            f'VALUES (%s, %s, %s)',
+            (recipe.id, recipe.name, recipe.text),
+        )
+
+
+def remove_from_search_index(recipe_id):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (recipe_id,))
+
+
+def rebuild_search_index():
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+            f'SELECT id, name, text FROM recipes_recipe')
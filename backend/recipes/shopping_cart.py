@@ -0,0 +1,110 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingCartIngredient
+
+
+def recipe_amounts(recipe_id):
+    return dict(RecipeIngredient.objects.filter(
+        recipe_id=recipe_id).values_list('ingredient_id', 'amount'))
+
+
+@transaction.atomic
+def apply_deltas(user_ids, deltas):
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not user_ids or not deltas:
+        return
+    ShoppingCartIngredient.objects.bulk_create(
+        [ShoppingCartIngredient(
+            user_id=user_id, ingredient_id=ingredient_id, amount=0)
+         for user_id in user_ids
+         for ingredient_id, delta in deltas.items() if delta > 0],
+        ignore_conflicts=True,
+    )
+    by_delta = defaultdict(list)
+    for ingredient_id, delta in deltas.items():
+        by_delta[delta].append(ingredient_id)
+    for delta, ingredient_ids in by_delta.items():
+        ShoppingCartIngredient.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=ingredient_ids
+        ).update(amount=F('amount') + delta)
+    ShoppingCartIngredient.objects.filter(
+        user_id__in=user_ids, amount__lte=0).delete()
+
+
+def add_recipe(user_id, recipe_id):
+    apply_deltas([user_id], recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    apply_deltas([user_id], {
+        ingredient_id: -amount
+        for ingredient_id, amount in recipe_amounts(recipe_id).items()
+    })
+
+
+def recipe_user_ids(recipe_id):
+    return list(ShoppingCart.objects.filter(
+        recipe_id=recipe_id).values_list('user_id', flat=True))
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    deltas = {
+        ingredient_id: (new_amounts.get(ingredient_id, 0)
+                        - old_amounts.get(ingredient_id, 0))
+        for ingredient_id in old_amounts.keys() | new_amounts.keys()
+    }
+    apply_deltas(recipe_user_ids(recipe_id), deltas)
+
+
+def expected_totals(user_ids=None):
+    lookup = {'recipe__shopping_cart__isnull': False}
+    if user_ids is not None:
+        lookup = {'recipe__shopping_cart__user_id__in': user_ids}
+    rows = RecipeIngredient.objects.filter(**lookup).values(
+        'recipe__shopping_cart__user_id', 'ingredient_id'
+    ).annotate(total=Sum('amount')).order_by()
+    return {
+        (row['recipe__shopping_cart__user_id'], row['ingredient_id']):
+            row['total']
+        for row in rows
+    }
+
+
+def stored_totals(user_ids=None):
+    queryset = ShoppingCartIngredient.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in queryset.values_list(
+            'user_id', 'ingredient_id', 'amount')
+    }
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    queryset = ShoppingCartIngredient.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    queryset.delete()
+    ShoppingCartIngredient.objects.bulk_create(
+        [ShoppingCartIngredient(
+            user_id=user_id, ingredient_id=ingredient_id, amount=amount)
+         for (user_id, ingredient_id), amount
+         in expected_totals(user_ids).items()],
+        batch_size=1000,
+    )
+
+
+def shopping_list(user):
+    return user.shopping_cart_ingredients.values(
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'amount',
+    ).order_by('ingredient__name')
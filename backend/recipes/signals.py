@@ -0,0 +1,154 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from users.models import User
+from .autocomplete import ingredient_index
+from .catalog import bump_version
+from .counters import change_counter
+from .fragments import invalidate_recipes
+from .models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                     ShoppingCart, Tag)
+from .pantry import refresh_pantry
+from .related import log_favorite_changes
+from .search import remove_from_search_index, update_search_index
+from .shopping_cart import add_recipe, change_recipe, remove_recipe
+from .tag_index import clear_tag_bit, update_tags_mask
+from .tasks import fan_out_recipe
+from .trending import log_removal
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+    bump_version('ingredients')
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    bump_version('tags')
+
+
+@receiver(post_delete, sender=Tag)
+def clear_deleted_tag(sender, instance, **kwargs):
+    clear_tag_bit(instance.bit)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_recipe_tags_mask(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_tags_mask([instance.id])
+    elif action == 'post_clear':
+        clear_tag_bit(instance.bit)
+    else:
+        update_tags_mask(pk_set)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_recipes([instance.id])
+    elif action == 'post_clear':
+        bump_version('tags')
+    else:
+        invalidate_recipes(pk_set)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    update_search_index(instance)
+    invalidate_recipes([instance.id])
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def invalidate_recipe_ingredients(sender, instance, **kwargs):
+    invalidate_recipes([instance.recipe_id])
+    refresh_pantry([instance.recipe_id])
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    remove_from_search_index(instance.id)
+    invalidate_recipes([instance.id])
+    refresh_pantry([instance.id])
+
+
+@receiver(post_save, sender=Recipe)
+def count_created_recipe(sender, instance, created, **kwargs):
+    if created and instance.author_id:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_created_recipe(sender, instance, created, **kwargs):
+    if created and instance.author_id:
+        fan_out_recipe.delay(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def count_deleted_recipe(sender, instance, **kwargs):
+    if instance.author_id:
+        change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorite)
+def count_created_favorite(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def count_deleted_favorite(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=Favorite)
+def log_created_favorite(sender, instance, created, **kwargs):
+    if created:
+        log_favorite_changes(instance.user_id, [instance.recipe_id])
+
+
+@receiver(post_delete, sender=Favorite)
+def log_deleted_favorite(sender, instance, **kwargs):
+    log_favorite_changes(instance.user_id, [instance.recipe_id])
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def log_trending_removal(sender, instance, **kwargs):
+    log_removal(instance)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_cart_totals(sender, instance, created, **kwargs):
+    if created:
+        add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_cart_totals(sender, instance, **kwargs):
+    remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_recipe_ingredient(sender, instance, **kwargs):
+    instance.saved_amounts = dict(RecipeIngredient.objects.filter(
+        pk=instance.pk).values_list('ingredient_id', 'amount'))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def change_cart_totals(sender, instance, **kwargs):
+    change_recipe(instance.recipe_id, instance.saved_amounts,
+                  {instance.ingredient_id: instance.amount})
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def remove_ingredient_from_cart_totals(sender, instance, **kwargs):
+    change_recipe(instance.recipe_id,
+                  {instance.ingredient_id: instance.amount}, {})
@@ -0,0 +1,61 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+
+from .catalog import get_version
+from .fragments import cache_is_shared
+from .models import Recipe, Tag
+
+TAG_BITS_KEY = 'tag-bits:{}'
+
+
+def tag_bits():
+    if not cache_is_shared():
+        return dict(Tag.objects.values_list('slug', 'bit'))
+    key = TAG_BITS_KEY.format(get_version('tags'))
+    bits = cache.get(key)
+    if bits is None:
+        bits = dict(Tag.objects.values_list('slug', 'bit'))
+        cache.set(key, bits, settings.CATALOG_PAYLOAD_TTL)
+    return bits
+
+
+def update_tags_mask(recipe_ids):
+    masks = dict.fromkeys(recipe_ids, 0)
+    for recipe_id, bit in Recipe.tags.through.objects.filter(
+            recipe_id__in=masks).values_list('recipe_id', 'tag__bit'):
+        masks[recipe_id] |= 1 << bit
+    by_mask = defaultdict(list)
+    for recipe_id, mask in masks.items():
+        by_mask[mask].append(recipe_id)
+    for mask, ids in by_mask.items():
+        Recipe.objects.filter(id__in=ids).update(tags_mask=mask)
+
+
+def clear_tag_bit(bit):
+    Recipe.objects.annotate(
+        tag_bit=F('tags_mask').bitand(1 << bit)
+    ).exclude(tag_bit=0).update(
+        tags_mask=F('tags_mask').bitand(~(1 << bit)))
+
+
+def filter_by_tags(queryset, mask, match_all=False):
+    queryset = queryset.annotate(tag_match=F('tags_mask').bitand(mask))
+    if match_all:
+        return queryset.filter(tag_match=mask)
+    return queryset.exclude(tag_match=0)
+
+
+def tag_facets(queryset):
+    counts = defaultdict(int)
+    for mask, total in queryset.order_by().values('tags_mask').annotate(
+            total=Count('id')).values_list('tags_mask', 'total'):
+        while mask:
+            bit = mask & -mask
+            counts[bit.bit_length() - 1] += total
+            mask ^= bit
+    return {
+        slug: counts.get(bit, 0) for slug, bit in tag_bits().items()
+    }
@@ -0,0 +1,64 @@
+from tasks.queue import task
+from users.models import User
+from .counters import recount
+from .feed import backfill_followers, fan_out, fans_out
+from .images import process_recipe_image
+from .models import Recipe
+from .related import build_related, refresh_related
+from .shopping_cart import rebuild
+from .trending import update_trending
+
+
+@task(max_attempts=3)
+def make_image_variants(recipe_id):
+    return process_recipe_image(recipe_id)
+
+
+@task(max_attempts=3)
+def fan_out_recipe(recipe_id):
+    recipe = Recipe.objects.select_related('author').filter(
+        id=recipe_id).first()
+    if recipe is None:
+        return {'entries': 0}
+    return {'entries': fan_out(recipe)}
+
+
+@task(max_attempts=3)
+def backfill_author_feeds(author_id):
+    author = User.objects.filter(id=author_id).first()
+    if author is None or not fans_out(author):
+        return {'entries': 0}
+    return {'entries': backfill_followers(author_id)}
+
+
+@task(max_attempts=1)
+def backfill_image_variants(force=False):
+    recipes = Recipe.objects.exclude(image='')
+    if not force:
+        recipes = recipes.filter(image_variants={})
+    recipe_ids = list(recipes.values_list('id', flat=True))
+    for recipe_id in recipe_ids:
+        make_image_variants.delay(recipe_id)
+    return {'queued': len(recipe_ids)}
+
+
+@task(max_attempts=1)
+def recount_counters():
+    recount()
+
+
+@task(max_attempts=1)
+def rebuild_shopping_cart_totals(user_ids=None):
+    rebuild(user_ids)
+
+
+@task(max_attempts=1)
+def build_related_recipes(incremental=True):
+    if incremental:
+        return {'refreshed': refresh_related()}
+    return {'recipes': build_related()}
+
+
+@task(max_attempts=1)
+def update_trending_scores(full=False):
+    return {'recipes': update_trending(full=full)}
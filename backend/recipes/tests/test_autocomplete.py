@@ -0,0 +1,63 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from recipes.autocomplete import IngredientIndex
+
+ROWS = [
+    {'id': 1, 'name': 'Соль', 'measurement_unit': 'г'},
+    {'id': 2, 'name': 'Сахар', 'measurement_unit': 'г'},
+    {'id': 3, 'name': 'Морская соль', 'measurement_unit': 'г'},
+]
+
+
+class FakeIngredientIndex(IngredientIndex):
+
+    def __init__(self, ttl=None, delay=0, on_build=None):
+        super().__init__(ttl=ttl)
+        self.delay = delay
+        self.on_build = on_build
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        time.sleep(self.delay)
+        if self.on_build is not None:
+            self.on_build()
+        entries = tuple(sorted(
+            (row['name'].lower(), row['id'], row) for row in ROWS))
+        return (tuple(entry[0] for entry in entries), entries,
+                time.monotonic())
+
+
+class IngredientIndexTests(SimpleTestCase):
+
+    def test_prefix_matches_come_first(self):
+        index = FakeIngredientIndex()
+        self.assertEqual(
+            [row['id'] for row in index.search('сол')], [1, 3])
+        self.assertEqual(
+            [row['id'] for row in index.search('', limit=2)], [3, 2])
+
+    def test_concurrent_searches_build_once(self):
+        index = FakeIngredientIndex(ttl=60, delay=0.2)
+        threads = [
+            threading.Thread(target=index.search, args=('соль',))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(index.builds, 1)
+
+    def test_invalidate_during_build(self):
+        index = FakeIngredientIndex()
+        index.on_build = index.invalidate
+        self.assertEqual(len(index.search('с')), 3)
+        index.on_build = None
+        index.search('с')
+        self.assertEqual(index.builds, 2)
+        index.search('с')
+        self.assertEqual(index.builds, 2)
@@ -0,0 +1,37 @@
+from django.test import TestCase
+
+from recipes.counters import change_counter
+from recipes.models import Recipe
+from recipes.tests.utils import create_recipe, create_user
+from users.models import User
+
+
+class DerivedFieldsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.recipe = create_recipe(cls.author)
+
+    def test_full_save_keeps_counters(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        author = User.objects.get(pk=self.author.pk)
+        change_counter(Recipe, recipe.pk, 'favorites_count', 2)
+        change_counter(User, author.pk, 'followers_count', 3)
+        recipe.name = 'Новое название'
+        recipe.save()
+        author.set_password('password-456')
+        author.save()
+        recipe.refresh_from_db()
+        author.refresh_from_db()
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 2)
+        self.assertTrue(author.check_password('password-456'))
+        self.assertEqual(author.followers_count, 3)
+
+    def test_explicit_update_fields_are_kept(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        recipe.favorites_count = 5
+        recipe.save(update_fields=['favorites_count'])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 5)
@@ -0,0 +1,77 @@
+from django.test import TestCase, override_settings
+
+from recipes.feed import feed_ids
+from recipes.models import FeedEntry
+from recipes.tests.utils import create_recipe, create_users
+from tasks.models import Task
+from tasks.queue import execute
+from users.models import Subscribe
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=2, FEED_BACKFILL=100)
+class FeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.quiet, cls.popular, *cls.fans = create_users(5)
+
+    def publish(self, author, count=1):
+        recipes = [create_recipe(author) for _ in range(count)]
+        self.run_tasks()
+        return [recipe.id for recipe in recipes]
+
+    def run_tasks(self):
+        for task in Task.objects.filter(status=Task.PENDING):
+            execute(task)
+
+    def subscribe(self, user, author):
+        Subscribe.objects.create(user=user, author=author)
+        self.run_tasks()
+
+    def unsubscribe(self, user, author):
+        Subscribe.objects.get(user=user, author=author).delete()
+        self.run_tasks()
+
+    def read_feed(self, user, limit=4):
+        result = []
+        before = None
+        while True:
+            page = feed_ids(user, before, limit + 1)
+            result.extend(page[:limit])
+            if len(page) <= limit:
+                return result
+            before = page[limit - 1]
+
+    def test_merges_fanned_out_and_popular_authors(self):
+        for user in (self.reader, *self.fans):
+            self.subscribe(user, self.popular)
+        self.subscribe(self.reader, self.quiet)
+        quiet = self.publish(self.quiet, 3)
+        popular = self.publish(self.popular, 3)
+        quiet += self.publish(self.quiet, 2)
+        self.assertFalse(FeedEntry.objects.filter(
+            recipe_id__in=popular).exists())
+        self.assertEqual(
+            self.read_feed(self.reader),
+            sorted(quiet + popular, reverse=True))
+
+    def test_subscribe_backfills_and_unsubscribe_drops(self):
+        recipe_ids = self.publish(self.quiet, 3)
+        self.subscribe(self.reader, self.quiet)
+        self.assertEqual(
+            self.read_feed(self.reader), sorted(recipe_ids, reverse=True))
+        self.unsubscribe(self.reader, self.quiet)
+        self.assertEqual(self.read_feed(self.reader), [])
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+
+    def test_author_dropping_to_threshold_is_backfilled(self):
+        early = self.publish(self.popular, 2)
+        for user in (self.reader, *self.fans):
+            self.subscribe(user, self.popular)
+        late = self.publish(self.popular, 2)
+        self.assertFalse(FeedEntry.objects.filter(recipe_id__in=late).exists())
+        self.unsubscribe(self.fans[0], self.popular)
+        expected = sorted(early + late, reverse=True)
+        self.assertEqual(self.read_feed(self.reader), expected)
+        self.assertEqual(self.read_feed(self.fans[1]), expected)
+        self.assertEqual(self.read_feed(self.fans[0]), [])
@@ -0,0 +1,58 @@
+import io
+import json
+from unittest import mock
+
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from recipes.management.commands.import_ingredients import iter_csv, iter_json
+
+ITEMS = [
+    {'name': 'Соль', 'measurement_unit': 'г'},
+    {'name': 'Молоко', 'measurement_unit': 'мл'},
+    {'name': 'Яйца', 'measurement_unit': 'шт.'},
+]
+
+
+@mock.patch(
+    'recipes.management.commands.import_ingredients.CHUNK_SIZE', 7)
+class ImportIngredientsTests(SimpleTestCase):
+
+    def read_json(self, text):
+        return list(iter_json(io.StringIO(text)))
+
+    def test_reads_array_across_chunks(self):
+        self.assertEqual(
+            self.read_json(json.dumps(ITEMS, ensure_ascii=False, indent=2)),
+            [(item['name'], item['measurement_unit']) for item in ITEMS])
+        self.assertEqual(self.read_json(' [ ] \n'), [])
+
+    def test_rejects_malformed_json(self):
+        text = json.dumps(ITEMS, ensure_ascii=False)
+        cases = {
+            'unterminated': text[:-1],
+            'cut at item': text[:text.index('}') + 1],
+            'object': json.dumps(ITEMS[0]),
+            'empty': '',
+            'missing comma': text.replace('}, {', '} {'),
+            'trailing data': text + '[]',
+        }
+        for case, text in cases.items():
+            with self.subTest(case=case):
+                with self.assertRaises(CommandError):
+                    self.read_json(text)
+
+    def test_rejects_long_values(self):
+        cases = (
+            (iter_json, json.dumps([{'name': 'а' * 101,
+                                     'measurement_unit': 'г'}]),
+             'Элемент 1'),
+            (iter_json, json.dumps([{'name': 'Соль',
+                                     'measurement_unit': 'г' * 201}]),
+             'Элемент 1'),
+            (iter_csv, 'Соль,г\n' + 'а' * 101 + ',г\n', 'Строка 2'),
+        )
+        for reader, text, position in cases:
+            with self.subTest(position=position):
+                with self.assertRaisesMessage(CommandError, position):
+                    list(reader(io.StringIO(text)))
@@ -0,0 +1,130 @@
+import random
+
+from django.test import SimpleTestCase, TestCase
+
+from recipes.models import Ingredient, RecipeIngredient
+from recipes.pantry import PantryIndex, bitset, pantry_index
+from recipes.tests.utils import create_recipe, create_user
+
+
+class FakePantryIndex(PantryIndex):
+
+    def __init__(self, recipes, ttl=None):
+        super().__init__(ttl=ttl)
+        self.recipes = recipes
+
+    def _read(self, recipe_ids=None):
+        if recipe_ids is None:
+            return {
+                recipe_id: list(ingredient_ids)
+                for recipe_id, ingredient_ids in sorted(self.recipes.items())
+            }
+        return {
+            recipe_id: list(self.recipes[recipe_id])
+            for recipe_id in recipe_ids if recipe_id in self.recipes
+        }
+
+
+def brute_force(recipes, pantry, limit):
+    rows = []
+    for recipe_id, ingredient_ids in recipes.items():
+        ingredient_ids = set(ingredient_ids)
+        hits = len(ingredient_ids & pantry)
+        if hits:
+            size = len(ingredient_ids)
+            rows.append((size - hits, -size, -recipe_id, hits))
+    rows.sort()
+    return [
+        (-recipe_id, hits, -size)
+        for _, size, recipe_id, hits in rows[:limit]
+    ]
+
+
+class PantryIndexTests(SimpleTestCase):
+
+    def test_bitset(self):
+        self.assertEqual(bitset([0, 3, 9], 10), 0b1000001001)
+        self.assertEqual(bitset([], 0), 0)
+
+    def test_search_matches_brute_force(self):
+        rng = random.Random(0)
+        recipes = {
+            recipe_id: rng.sample(range(1, 40), rng.randint(1, 8))
+            for recipe_id in range(1, 301)
+        }
+        index = FakePantryIndex(recipes)
+        for _ in range(50):
+            pantry = set(rng.sample(range(1, 40), rng.randint(1, 10)))
+            with self.subTest(pantry=pantry):
+                found = index.search(pantry, 10)
+                self.assertEqual(
+                    [row[:3] for row in found],
+                    brute_force(recipes, pantry, 10))
+                for recipe_id, _, _, missing in found:
+                    self.assertEqual(
+                        set(missing), set(recipes[recipe_id]) - pantry)
+
+    def test_max_missing(self):
+        index = FakePantryIndex({1: [1, 2], 2: [1, 2, 3], 3: [1, 4, 5, 6]})
+        self.assertEqual(
+            [row[0] for row in index.search([1, 2], 10, max_missing=0)], [1])
+        self.assertEqual(
+            [row[0] for row in index.search([1, 2], 10, max_missing=1)],
+            [1, 2])
+        self.assertEqual(
+            [row[0] for row in index.search([1, 2], 10)], [1, 2, 3])
+
+    def test_refresh(self):
+        recipes = {1: [1, 2], 2: [3]}
+        index = FakePantryIndex(recipes)
+        index.search([1], 10)
+        recipes[1] = [3, 4]
+        recipes[3] = [1]
+        del recipes[2]
+        index.refresh([1, 2, 3])
+        self.assertEqual(
+            [row[:3] for row in index.search([1, 3], 10)],
+            [(3, 1, 1), (1, 1, 2)])
+
+    def test_refresh_during_rebuild_is_replayed(self):
+        recipes = {1: [1], 2: [2]}
+        index = FakePantryIndex(recipes, ttl=0)
+        index.search([1], 10)
+        read = index._read
+
+        def read_and_change(recipe_ids=None):
+            snapshot = read(recipe_ids)
+            if recipe_ids is None:
+                recipes[3] = [1]
+                index.refresh([3])
+            return snapshot
+
+        index._read = read_and_change
+        index.search([1], 10)
+        index.ttl = None
+        self.assertEqual(
+            [row[0] for row in index.search([1], 10)], [3, 1])
+
+
+class PantrySignalsTests(TestCase):
+
+    def test_recipe_ingredient_changes_refresh_index(self):
+        salt, sugar = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('соль', 'сахар'))
+        recipe = create_recipe(create_user('author'))
+        pantry_index.invalidate()
+        pantry_index.search([salt.id], 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            item = RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=salt, amount=5)
+        self.assertEqual(
+            [row[0] for row in pantry_index.search([salt.id], 10)],
+            [recipe.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            item.ingredient = sugar
+            item.save()
+        self.assertEqual(pantry_index.search([salt.id], 10), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertEqual(pantry_index.search([sugar.id], 10), [])
@@ -0,0 +1,67 @@
+from unittest import skipIf
+
+from django.test import TestCase, override_settings
+
+from recipes import related
+from recipes.models import Favorite, FavoriteChange, RelatedRecipe
+from recipes.tests.utils import create_recipe, create_users
+
+
+@skipIf(related.np is None, 'нужны numpy и scipy')
+@override_settings(RELATED_RECIPES_TOP_K=10)
+class RelatedRecipesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users(4)
+        cls.recipes = [create_recipe(cls.users[0]) for _ in range(4)]
+
+    def favorite(self, user, *recipes):
+        for recipe in recipes:
+            Favorite.objects.create(user=user, recipe=recipe)
+
+    def related_scores(self):
+        return {
+            (recipe_id, related_id): round(score, 6)
+            for recipe_id, related_id, score in
+            RelatedRecipe.objects.values_list(
+                'recipe_id', 'related_id', 'score')
+        }
+
+    def test_cosine_similarity(self):
+        first, second, third, _ = self.recipes
+        self.favorite(self.users[0], first, second)
+        self.favorite(self.users[1], first, second, third)
+        self.favorite(self.users[2], third)
+        self.assertEqual(related.build_related(), 3)
+        self.assertEqual(self.related_scores(), {
+            (first.id, second.id): 1.0,
+            (second.id, first.id): 1.0,
+            (first.id, third.id): 0.5,
+            (third.id, first.id): 0.5,
+            (second.id, third.id): 0.5,
+            (third.id, second.id): 0.5,
+        })
+        self.assertFalse(FavoriteChange.objects.exists())
+
+    def test_top_k(self):
+        self.favorite(self.users[0], *self.recipes)
+        related.build_related(top_k=2)
+        for recipe in self.recipes:
+            self.assertEqual(
+                RelatedRecipe.objects.filter(recipe=recipe).count(), 2)
+
+    def test_refresh_matches_full_build(self):
+        first, second, third, fourth = self.recipes
+        self.favorite(self.users[0], first, second)
+        self.favorite(self.users[1], second, third)
+        related.build_related()
+        self.favorite(self.users[2], third, fourth)
+        self.favorite(self.users[1], fourth)
+        Favorite.objects.filter(user=self.users[0], recipe=second).delete()
+        self.assertTrue(FavoriteChange.objects.exists())
+        related.refresh_related()
+        refreshed = self.related_scores()
+        related.build_related()
+        self.assertEqual(refreshed, self.related_scores())
+        self.assertEqual(related.refresh_related(), 0)
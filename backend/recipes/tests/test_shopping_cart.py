@@ -0,0 +1,106 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, RecipeIngredient, ShoppingCart, Tag
+from recipes.shopping_cart import expected_totals, rebuild, stored_totals
+from recipes.tests.utils import create_recipe, create_user, create_users
+
+
+class ShoppingCartTotalsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.users = create_users(2)
+        cls.tag = Tag.objects.create(
+            name='Завтрак', slug='breakfast', color='#E26C2D')
+        cls.salt, cls.sugar, cls.flour = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('соль', 'сахар', 'мука'))
+
+    def recipe_with(self, amounts):
+        recipe = create_recipe(self.author)
+        for ingredient, amount in amounts.items():
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=amount)
+        return recipe
+
+    def assertTotals(self, expected=None):
+        if expected is not None:
+            self.assertEqual(stored_totals(), expected)
+        self.assertEqual(stored_totals(), expected_totals())
+
+    def test_add_and_remove_recipes(self):
+        first = self.recipe_with({self.salt: 5, self.sugar: 10})
+        second = self.recipe_with({self.salt: 3, self.flour: 200})
+        user = self.users[0]
+        ShoppingCart.objects.create(user=user, recipe=first)
+        ShoppingCart.objects.create(user=user, recipe=second)
+        self.assertTotals({
+            (user.id, self.salt.id): 8,
+            (user.id, self.sugar.id): 10,
+            (user.id, self.flour.id): 200,
+        })
+        ShoppingCart.objects.filter(user=user, recipe=first).delete()
+        self.assertTotals({
+            (user.id, self.salt.id): 3,
+            (user.id, self.flour.id): 200,
+        })
+        second.delete()
+        self.assertTotals({})
+
+    def test_recipe_ingredient_changes_reach_every_cart(self):
+        recipe = self.recipe_with({self.salt: 5, self.sugar: 10})
+        for user in self.users:
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+        salt = RecipeIngredient.objects.get(
+            recipe=recipe, ingredient=self.salt)
+        salt.amount = 7
+        salt.save()
+        salt.ingredient = self.flour
+        salt.save()
+        RecipeIngredient.objects.filter(
+            recipe=recipe, ingredient=self.sugar).delete()
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=self.sugar, amount=1)
+        self.assertTotals({
+            (user.id, ingredient.id): amount
+            for user in self.users
+            for ingredient, amount in ((self.flour, 7), (self.sugar, 1))
+        })
+
+    def test_deleting_user_or_ingredient(self):
+        recipe = self.recipe_with({self.salt: 5, self.sugar: 10})
+        for user in self.users:
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+        self.users[0].delete()
+        self.sugar.delete()
+        self.assertTotals({(self.users[1].id, self.salt.id): 5})
+
+    def test_api_update_applies_deltas(self):
+        recipe = self.recipe_with({self.salt: 5, self.sugar: 10})
+        recipe.tags.add(self.tag)
+        user = self.users[0]
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.patch(f'/api/recipes/{recipe.id}/', {
+            'ingredients': [
+                {'id': self.salt.id, 'amount': 6},
+                {'id': self.flour.id, 'amount': 100},
+            ],
+            'tags': [self.tag.id],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTotals({
+            (user.id, self.salt.id): 6,
+            (user.id, self.flour.id): 100,
+        })
+
+    def test_rebuild_restores_drifted_totals(self):
+        recipe = self.recipe_with({self.salt: 5})
+        user = self.users[0]
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+        user.shopping_cart_ingredients.update(amount=1)
+        rebuild([user.id])
+        self.assertTotals({(user.id, self.salt.id): 5})
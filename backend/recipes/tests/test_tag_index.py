@@ -0,0 +1,14 @@
+from django.test import TestCase
+
+from recipes.models import Tag
+from recipes.tag_index import tag_bits
+
+
+class TagBitsTests(TestCase):
+
+    def test_local_cache_reads_current_bits(self):
+        tag = Tag.objects.create(
+            name='Завтрак', slug='breakfast', color='#000001')
+        self.assertEqual(tag_bits(), {'breakfast': tag.bit})
+        Tag.objects.filter(pk=tag.pk).update(slug='lunch')
+        self.assertEqual(tag_bits(), {'lunch': tag.bit})
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from recipes.models import (Favorite, Recipe, ShoppingCart, TrendingRemoval,
+                            TrendingState)
+from recipes.tests.utils import create_recipe, create_users
+from recipes.trending import update_trending
+
+DAY = 24 * 60 * 60
+
+
+@override_settings(
+    TRENDING_HALF_LIFE=DAY, TRENDING_LAG=60,
+    TRENDING_WEIGHTS={'favorite': 1.0, 'shopping_cart': 0.5})
+class TrendingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, *cls.users = create_users(4)
+        cls.old, cls.fresh, cls.cart = (
+            create_recipe(cls.author) for _ in range(3))
+
+    def add_event(self, model, user, recipe, age):
+        event = model.objects.create(user=user, recipe=recipe)
+        model.objects.filter(pk=event.pk).update(
+            created=timezone.now() - timedelta(seconds=age))
+
+    def scores(self):
+        return dict(Recipe.objects.values_list('id', 'trending_score'))
+
+    def assertProportional(self, first, second):
+        ratio = first[self.fresh.id] / second[self.fresh.id]
+        for recipe_id, score in first.items():
+            self.assertAlmostEqual(score, second[recipe_id] * ratio)
+
+    def test_scores_decay_with_age(self):
+        self.add_event(Favorite, self.users[0], self.old, 2 * DAY)
+        self.add_event(Favorite, self.users[1], self.old, 2 * DAY)
+        self.add_event(Favorite, self.users[0], self.fresh, 120)
+        self.add_event(ShoppingCart, self.users[0], self.cart, 120)
+        self.add_event(Favorite, self.users[2], self.cart, 10)
+        self.assertEqual(update_trending(), 3)
+        scores = self.scores()
+        self.assertAlmostEqual(
+            scores[self.old.id] / scores[self.fresh.id], 0.5, places=2)
+        self.assertAlmostEqual(
+            scores[self.cart.id] / scores[self.fresh.id], 0.5, places=5)
+        self.assertEqual(
+            list(Recipe.objects.order_by('-trending_score').values_list(
+                'id', flat=True)),
+            [self.fresh.id, self.old.id, self.cart.id])
+
+    def test_incremental_update_matches_full_recount(self):
+        self.add_event(Favorite, self.users[0], self.old, 3 * DAY)
+        self.add_event(Favorite, self.users[0], self.fresh, DAY)
+        update_trending()
+        TrendingState.objects.update(
+            processed_until=timezone.now() - timedelta(hours=1))
+        self.add_event(Favorite, self.users[1], self.fresh, 1800)
+        self.add_event(ShoppingCart, self.users[1], self.cart, 600)
+        self.assertEqual(update_trending(), 2)
+        incremental = self.scores()
+        update_trending(full=True)
+        self.assertProportional(incremental, self.scores())
+
+    def test_rebase_keeps_scores_proportional(self):
+        self.add_event(Favorite, self.users[0], self.old, 2 * DAY)
+        self.add_event(Favorite, self.users[0], self.fresh, DAY)
+        update_trending()
+        state = TrendingState.objects.get()
+        epoch = state.epoch - timedelta(days=50)
+        TrendingState.objects.update(
+            epoch=epoch,
+            processed_until=timezone.now() - timedelta(hours=1))
+        Recipe.objects.update(trending_score=F('trending_score') * 2 ** 50)
+        self.add_event(ShoppingCart, self.users[1], self.fresh, 600)
+        update_trending()
+        self.assertGreater(TrendingState.objects.get().epoch, epoch)
+        rebased = self.scores()
+        update_trending(full=True)
+        self.assertProportional(rebased, self.scores())
+
+    @override_settings(TRENDING_LAG=0)
+    def test_removed_events_are_subtracted(self):
+        self.add_event(Favorite, self.users[0], self.old, DAY)
+        self.add_event(ShoppingCart, self.users[0], self.cart, DAY)
+        self.add_event(Favorite, self.users[1], self.fresh, DAY)
+        update_trending()
+        for _ in range(5):
+            Favorite.objects.filter(user=self.users[1]).delete()
+            Favorite.objects.create(user=self.users[1], recipe=self.fresh)
+            update_trending()
+        ShoppingCart.objects.filter(user=self.users[0]).delete()
+        update_trending()
+        incremental = self.scores()
+        self.assertAlmostEqual(incremental[self.cart.id], 0)
+        self.assertFalse(TrendingRemoval.objects.exists())
+        update_trending(full=True)
+        self.assertProportional(incremental, self.scores())
+
+    @override_settings(TRENDING_LAG=0)
+    def test_events_removed_before_counting_are_ignored(self):
+        self.add_event(Favorite, self.users[0], self.old, DAY)
+        update_trending()
+        Favorite.objects.create(user=self.users[1], recipe=self.fresh)
+        Favorite.objects.filter(user=self.users[1]).delete()
+        update_trending()
+        self.assertEqual(self.scores()[self.fresh.id], 0)
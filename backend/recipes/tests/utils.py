@@ -0,0 +1,19 @@
+from recipes.models import Recipe
+from users.models import User
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        password='password-123', first_name='Пользователь',
+        last_name=username)
+
+
+def create_users(count, prefix='user'):
+    return [create_user(f'{prefix}{number}') for number in range(count)]
+
+
+def create_recipe(author, **fields):
+    return Recipe.objects.create(
+        author=author, name='Рецепт', text='Описание', cooking_time=10,
+        image='recipes/images/test.png', **fields)
@@ -0,0 +1,103 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from .models import (Favorite, Recipe, ShoppingCart, TrendingRemoval,
+                     TrendingState)
+
+EVENTS = (
+    (Favorite, 'favorite'),
+    (ShoppingCart, 'shopping_cart'),
+)
+EVENT_NAMES = dict(EVENTS)
+REBASE_AFTER_HALF_LIVES = 40
+BATCH_SIZE = 500
+
+
+def decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def event_scores(since, until, epoch):
+    rate = decay_rate()
+    scores = defaultdict(float)
+    for model, name in EVENTS:
+        weight = settings.TRENDING_WEIGHTS[name]
+        events = model.objects.filter(created__lte=until)
+        if since is not None:
+            events = events.filter(created__gt=since)
+        for recipe_id, created in events.values_list(
+                'recipe_id', 'created').iterator():
+            scores[recipe_id] += weight * math.exp(
+                rate * (created - epoch).total_seconds())
+    return scores
+
+
+def log_removal(instance):
+    TrendingRemoval.objects.create(
+        recipe_id=instance.recipe_id,
+        event=EVENT_NAMES[type(instance)],
+        created=instance.created,
+    )
+
+
+def subtract_removals(scores, since, until, epoch):
+    rate = decay_rate()
+    removals = TrendingRemoval.objects.filter(
+        removed__lte=until, created__lte=since)
+    for recipe_id, event, created in removals.values_list(
+            'recipe_id', 'event', 'created').iterator():
+        scores[recipe_id] -= settings.TRENDING_WEIGHTS[event] * math.exp(
+            rate * (created - epoch).total_seconds())
+
+
+def add_scores(scores):
+    items = list(scores.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        batch = items[start:start + BATCH_SIZE]
+        Recipe.objects.filter(
+            id__in=[recipe_id for recipe_id, _ in batch]
+        ).update(trending_score=F('trending_score') + Case(
+            *[When(id=recipe_id, then=Value(score))
+              for recipe_id, score in batch],
+            default=Value(0.0),
+            output_field=FloatField(),
+        ))
+
+
+def rebase(state, until):
+    age = decay_rate() * (until - state.epoch).total_seconds()
+    if age < REBASE_AFTER_HALF_LIVES * math.log(2):
+        return
+    Recipe.objects.exclude(trending_score=0).update(
+        trending_score=F('trending_score') * math.exp(-age))
+    state.epoch = until
+
+
+@transaction.atomic
+def update_trending(full=False):
+    until = timezone.now() - timedelta(seconds=settings.TRENDING_LAG)
+    state = TrendingState.objects.select_for_update().first()
+    since = None
+    if full or state is None:
+        Recipe.objects.exclude(trending_score=0).update(trending_score=0)
+        TrendingState.objects.all().delete()
+        state = TrendingState(epoch=until)
+    elif until <= state.processed_until:
+        return 0
+    else:
+        since = state.processed_until
+        rebase(state, until)
+    scores = event_scores(since, until, state.epoch)
+    if since is not None:
+        subtract_removals(scores, since, until, state.epoch)
+    add_scores(scores)
+    TrendingRemoval.objects.filter(removed__lte=until).delete()
+    state.processed_until = until
+    state.save()
+    return len(scores)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib import admin
+
+from .models import PeriodicTask, Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'user', 'created')
+    search_fields = ('name',)
+    list_filter = ('status', 'name')
+    empty_value_display = settings.EMPTY_VALUE
+
+
+@admin.register(PeriodicTask)
+class PeriodicTaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'next_run')
@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.queue import registry
+
+
+class Command(BaseCommand):
+    help = 'Ставит зарегистрированную задачу в очередь'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?')
+        parser.add_argument(
+            'args', nargs='*', help='Аргументы задачи в формате JSON')
+        parser.add_argument(
+            '--list', action='store_true', help='Показать список задач')
+
+    def handle(self, *args, **options):
+        if options['list'] or not options['name']:
+            for name in sorted(registry):
+                self.stdout.write(name)
+            return
+        task_function = registry.get(options['name'])
+        if task_function is None:
+            raise CommandError(f'Неизвестная задача {options["name"]}')
+        task = task_function.delay(*map(json.loads, options['args']))
+        self.stdout.write(self.style.SUCCESS(
+            f'Задача {task.pk} поставлена в очередь'))
@@ -0,0 +1,59 @@
+import signal
+import sys
+import time
+from multiprocessing import Process
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.queue import work
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчик фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Количество процессов-обработчиков')
+        parser.add_argument(
+            '--poll-interval', type=float, default=1,
+            help='Пауза между опросами пустой очереди, в секундах')
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        self.worker_options = {
+            'poll_interval': options['poll_interval'],
+            'burst': options['burst'],
+        }
+        if options['processes'] == 1:
+            work(**self.worker_options)
+            return
+        signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+        processes = [self.start() for _ in range(options['processes'])]
+        try:
+            while processes:
+                time.sleep(1)
+                processes = [
+                    self.restart(process) if process.exitcode else process
+                    for process in processes if process.exitcode != 0
+                ]
+        except (KeyboardInterrupt, SystemExit):
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+
+    def start(self):
+        connections.close_all()
+        process = Process(target=work, kwargs=self.worker_options)
+        process.start()
+        return process
+
+    def restart(self, process):
+        self.stderr.write(
+            f'Обработчик {process.pid} завершился с кодом '
+            f'{process.exitcode}, запускаю новый')
+        return self.start()
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.3 on 2026-10-18 03:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodicTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Задача')),
+                ('next_run', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Следующий запуск')),
+            ],
+            options={
+                'verbose_name': 'Периодическая задача',
+                'verbose_name_plural': 'Периодические задачи',
+                'ordering': ('name',),
+            },
+        ),
+    ]
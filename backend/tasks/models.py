@@ -0,0 +1,66 @@
+from django.db import models
+from django.utils import timezone
+
+from users.models import User
+
+
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (SUCCESS, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    args = models.JSONField('Аргументы', default=list, blank=True)
+    kwargs = models.JSONField('Именованные аргументы', default=dict,
+                              blank=True)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=3)
+    result = models.JSONField('Результат', null=True, blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='tasks',
+        verbose_name='Пользователь',
+    )
+    run_after = models.DateTimeField('Запустить после', default=timezone.now)
+    started_at = models.DateTimeField('Начало', null=True, blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    updated = models.DateTimeField('Обновлена', auto_now=True)
+
+    class Meta:
+        ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['status', 'run_after'],
+                         name='task_queue_idx'),
+        ]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class PeriodicTask(models.Model):
+    name = models.CharField('Задача', max_length=200, unique=True)
+    next_run = models.DateTimeField('Следующий запуск', default=timezone.now)
+
+    class Meta:
+        ordering = ('name',)
+        verbose_name = 'Периодическая задача'
+        verbose_name_plural = 'Периодические задачи'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,135 @@
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PeriodicTask, Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class TaskFunction:
+
+    def __init__(self, func, max_attempts):
+        self.func = func
+        self.max_attempts = max_attempts
+        self.name = f'{func.__module__}.{func.__name__}'
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, user=None, **kwargs):
+        task = Task.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            max_attempts=self.max_attempts,
+            user=user,
+        )
+        if settings.TASKS_ALWAYS_EAGER:
+            transaction.on_commit(lambda: execute(task))
+        return task
+
+
+def task(max_attempts=3):
+    def decorator(func):
+        task_function = TaskFunction(func, max_attempts)
+        registry[task_function.name] = task_function
+        return task_function
+    return decorator
+
+
+def requeue_stale():
+    stale_before = timezone.now() - timedelta(
+        seconds=settings.TASKS_STALE_AFTER)
+    stale = Task.objects.filter(
+        status=Task.RUNNING, started_at__lt=stale_before)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED,
+        error='Обработчик не завершил задачу за TASKS_STALE_AFTER')
+    return stale.update(status=Task.PENDING), failed
+
+
+def schedule_periodic():
+    now = timezone.now()
+    scheduled = []
+    for name, interval in settings.TASKS_PERIODIC.items():
+        task_function = registry.get(name)
+        if task_function is None:
+            logger.error('Неизвестная периодическая задача %s', name)
+            continue
+        PeriodicTask.objects.get_or_create(
+            name=name, defaults={'next_run': now})
+        due = PeriodicTask.objects.filter(
+            name=name, next_run__lte=now
+        ).update(next_run=now + timedelta(seconds=interval))
+        if due:
+            scheduled.append(task_function.delay())
+    return scheduled
+
+
+def claim():
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.PENDING, run_after__lte=now
+    ).order_by('run_after', 'id').values_list('id', flat=True)[:10]
+    for task_id in candidates:
+        claimed = Task.objects.filter(
+            pk=task_id, status=Task.PENDING
+        ).update(status=Task.RUNNING, started_at=now,
+                 attempts=F('attempts') + 1)
+        if claimed:
+            return Task.objects.get(pk=task_id)
+    return None
+
+
+def execute(task):
+    if task.status == Task.PENDING:
+        task.status = Task.RUNNING
+        task.attempts += 1
+        task.started_at = timezone.now()
+    task_function = registry.get(task.name)
+    try:
+        if task_function is None:
+            raise LookupError(f'Неизвестная задача {task.name}')
+        task.result = task_function(*task.args, **task.kwargs)
+    except Exception:
+        task.error = traceback.format_exc()
+        if task_function is not None and task.attempts < task.max_attempts:
+            task.status = Task.PENDING
+            task.run_after = timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY * 2 ** (task.attempts - 1))
+        else:
+            task.status = Task.FAILED
+        logger.exception('Задача %s (%s) завершилась с ошибкой',
+                         task.pk, task.name)
+    else:
+        task.status = Task.SUCCESS
+        task.error = ''
+    task.save()
+    return task
+
+
+def work(poll_interval=1, burst=False):
+    next_schedule = 0
+    while True:
+        close_old_connections()
+        if time.monotonic() >= next_schedule:
+            requeue_stale()
+            schedule_periodic()
+            next_schedule = (
+                time.monotonic() + settings.TASKS_SCHEDULE_INTERVAL)
+        task = claim()
+        if task is not None:
+            execute(task)
+            continue
+        if burst:
+            return
+        time.sleep(poll_interval)
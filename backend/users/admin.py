@@ -6,7 +6,8 @@ from .models import User, Subscribe
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'email', 'username', 'first_name', 'last_name')
+    list_display = ('pk', 'email', 'username', 'first_name', 'last_name',
+                    'recipes_count', 'followers_count')
     search_fields = ('username', 'email', 'first_name', 'last_name')
     list_filter = ('username', 'email')
     empty_value_display = settings.EMPTY_VALUE
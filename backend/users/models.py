@@ -2,7 +2,22 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 
-class User(AbstractUser):
+class DerivedFieldsMixin:
+    derived_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not args and not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.derived_fields
+            ]
+        return super().save(*args, **kwargs)
+
+
+class User(DerivedFieldsMixin, AbstractUser):
     email = models.EmailField(
         max_length=254,
         unique=True,
@@ -30,6 +45,18 @@ class User(AbstractUser):
         blank=False,
         null=False,
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False,
+    )
+
+    derived_fields = ('recipes_count', 'followers_count')
 
     class Meta:
         ordering = ['id']
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.counters import change_counter
+from recipes.feed import backfill, drop_author
+from recipes.fragments import invalidate_author
+from recipes.tasks import backfill_author_feeds
+from .models import Subscribe, User
+
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+@receiver(post_save, sender=Subscribe)
+def count_created_subscription(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def count_deleted_subscription(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscribe)
+def drop_feed_author(sender, instance, **kwargs):
+    drop_author(instance.user_id, instance.author_id)
+    if User.objects.filter(
+        pk=instance.author_id,
+        followers_count=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).exists():
+        backfill_author_feeds.delay(instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, created, update_fields,
+                              **kwargs):
+    if created:
+        return
+    if update_fields is not None and not (
+            set(update_fields) & set(AUTHOR_FIELDS)):
+        return
+    invalidate_author(instance.id)
@@ -1,6 +1,8 @@
-from api.paginations import CustomPaginator
-from api.serializers import UserGetSerializer, SubscribeSerializer
+from api.paginations import OptionalCursorPaginator
+from api.serializers import (UserGetSerializer, SubscribeSerializer,
+                             RecipesLimitSerializer)
 from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Prefetch, Subquery, Value
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -8,6 +10,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from recipes.models import Recipe
 from .models import Subscribe
 
 User = get_user_model()
@@ -16,7 +19,21 @@ User = get_user_model()
 class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     serializer_class = UserGetSerializer
-    pagination_class = CustomPaginator
+    pagination_class = OptionalCursorPaginator
+    cursor_ordering = 'id'
+
+    def get_authors_with_recipes(self):
+        serializer = RecipesLimitSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        recipes_limit = serializer.validated_data['recipes_limit']
+        recipes = Recipe.objects.filter(pk__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')).values('pk')[:recipes_limit]))
+        return User.objects.annotate(
+            is_subscribed=Value(True),
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes)
+        ).order_by('id')
 
     @action(
         detail=True,
@@ -32,7 +49,11 @@ class CustomUserViewSet(UserViewSet):
             serializer = SubscribeSerializer(
                 author, data=request.data, context={"request": request})
             serializer.is_valid(raise_exception=True)
+            authors = self.get_authors_with_recipes()
             Subscribe.objects.create(user=user, author=author)
+            author = authors.get(id=author.id)
+            serializer = SubscribeSerializer(
+                author, context={"request": request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
@@ -47,7 +68,8 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        queryset = User.objects.filter(subscribing__user=user)
+        queryset = self.get_authors_with_recipes().filter(
+            subscribing__user=user)
         pages = self.paginate_queryset(queryset)
         serializer = SubscribeSerializer(
             pages, many=True, context={'request': request})